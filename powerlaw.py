@@ -23,6 +23,8 @@
 # as described in https://docs.python.org/2/library/functions.html#print
 from __future__ import print_function
 import sys
+from functools import lru_cache
+from contextlib import contextmanager
 
 __version__ = "1.4.4-mdf"
 
@@ -51,6 +53,13 @@ class Fit(object):
         Whether to estimate the fit of a discrete power law using fast
         analytical methods, instead of calculating the fit exactly with
         slow numerical methods. Very accurate with xmin>6
+    zeta_table : bool, optional
+        Whether exact fits of discrete power laws (estimate_discrete=False)
+        interpolate the Hurwitz zeta function, their normalizer, from tables
+        over a grid of alpha for each xmin, to within 1e-12 of its log. The
+        tables are built the first time each xmin is fitted and shared by
+        all fits in the process, so this pays off when searching over many
+        of the same xmins for many datasets. Default False.
     sigma_threshold : float, optional
         Upper limit on the standard error of the power law fit. Used after
         fitting, when identifying valid xmin values.
@@ -58,6 +67,103 @@ class Fit(object):
         Dictionary of valid parameter ranges for fitting. Formatted as a
         dictionary of parameter names ('alpha' and/or 'sigma') and tuples
         of their lower and upper limits (ex. (1.5, 2.5), (None, .1)
+    fit_optimizer : str, optional
+        A method of scipy.optimize.minimize with which to fit the
+        distributions, such as 'L-BFGS-B', 'TNC' or 'trust-constr'. These
+        use the analytic gradients of the log likelihoods of continuous
+        distributions and keep the parameters within their valid ranges.
+        With one, a continuous power law with an xmax is normalized between
+        xmin and xmax. Default None, which uses the Nelder-Mead simplex of
+        scipy.optimize.fmin.
+    fit_starts : int, optional
+        The number of starting points from which to fit the distributions
+        with the Nelder-Mead simplex, keeping the best fit. The simplices
+        from all the starts move together, with the likelihood evaluated at
+        all their points at once. This guards against a poor local optimum
+        of distributions with several parameters for little more time than
+        one start. Default 1, which fits from the initial parameters alone.
+    xmin_scan_memory : int, optional
+        Approximate number of bytes of working memory to use at once when
+        calculating the distances for many candidate xmins together. Blocks
+        that fit in the processor's cache are fastest. Default 2**23 (8 MB).
+    n_jobs : int, optional
+        Number of worker processes among which to split the candidate xmins
+        when searching for the optimal xmin. -1 uses all processors.
+        Default 1, which searches in this process.
+    xmin_executor : concurrent.futures.Executor, optional
+        A process pool to use for the xmin search instead of starting a new
+        one. The data is shared with the workers through
+        multiprocessing.shared_memory rather than pickled to each of them.
+        A thread pool may be given instead; see xmin_backend.
+    search_strategy : 'exhaustive', 'adaptive' or 'binned', optional
+        Whether to evaluate every unique data value as a candidate xmin, or
+        to evaluate log-spaced candidates and then refine around the best
+        few. The adaptive search usually finds the same xmin with a small
+        fraction of the fits, as the distance changes smoothly with xmin.
+        Which candidates were evaluated is recorded in xmins_evaluated; the
+        others have a distance, alpha and sigma of nan. The binned search,
+        for very large data fitted by continuous power laws without an xmax,
+        buckets the data into xmin_bins log-spaced bins and approximates D at
+        each bin edge from the bins alone. Only the candidates in the bins on
+        either side of the best edge are then evaluated exactly, and are
+        those kept in xmins. The binned approximations are kept in
+        binned_xmins, binned_alphas, binned_sigmas and binned_Ds, and the
+        bound on their error in binned_D_errors and, at the best edge, in
+        xmin_D_error. Default 'exhaustive'.
+    xmin_bins : int, optional
+        The number of log-spaced bins of the binned search. Default 1000.
+    xmin_refinement_radius : int, optional
+        In the adaptive search, how many evaluated neighbors on either side
+        of each of the best candidates bound the candidates evaluated next.
+        Default 1.
+    xmin_candidate_budget : int, optional
+        The most candidates the adaptive search evaluates. Default None,
+        which refines until the best candidates' neighbors are all evaluated.
+    xmin_deadline : float, optional
+        Seconds after which the xmin search stops and the best candidate
+        evaluated so far is chosen. The candidates are evaluated in order of
+        priority: spread evenly over the quantiles of the data first, then
+        around the best of those, then, for the exhaustive search, the rest
+        from coarse to fine. Whether the search was cut short is recorded in
+        xmin_search_truncated and the fraction of candidates evaluated in
+        xmin_coverage. Default None, which has no limit.
+    xmin_sweep : bool, optional
+        Whether to fit the candidate xmins in increasing order, starting each
+        fit from the parameters of the previous candidate's fit. For
+        distributions fitted by numerical optimization, such as the
+        lognormal or truncated power law as the xmin_distribution, this
+        takes far fewer evaluations than starting each fit from the
+        distribution's initial estimate. Default False.
+    xmin_min_tail : int, optional
+        The fewest data points at and above a candidate xmin for it to be
+        considered. Fits to tails of a few points are unreliable and, when
+        fitted by optimization, slow. Default None, which considers every
+        candidate with at least two points.
+    xmin_profiles : tuple of strings, optional
+        Which distances between the data and the fit to keep for every
+        candidate xmin, besides xmin_distance, from 'D', 'D_plus',
+        'D_minus', 'V', 'Kappa' and 'Asquare'. Each is stored as an array
+        named with an added 's', such as Vs, and reselect_xmin can choose xmin
+        by any of them. For power laws they are all calculated in one pass
+        over the difference between the CDFs. Default ('D', 'V', 'Kappa',
+        'Asquare'). None keeps only xmin_distance.
+    xmin_progress : callable, optional
+        Called during the xmin search with the number of candidate xmins
+        evaluated so far, the total number of candidates, the smallest
+        xmin_distance of a valid fit so far (nan if none), and the seconds
+        elapsed. Default None, which prints the percentage of candidates
+        evaluated if verbose, and reports nothing otherwise.
+    xmin_progress_interval : float, optional
+        The fewest seconds between calls to xmin_progress, which is also
+        called once at the end of the search. Default .5.
+    xmin_backend : 'processes' or 'threads', optional
+        Whether the workers splitting the xmin search are processes or
+        threads. Threads avoid the cost of starting processes and sharing the
+        data, which dominates for data of moderate size, but only the
+        calculation of distances for many power law fits at once releases
+        the GIL. Other xmin searches with threads run in this thread.
+        Default 'processes', unless xmin_executor is a ThreadPoolExecutor.
+        The measured speedup of each search is in xmin_diagnostics.
     """
 
     def __init__(self, data,
@@ -66,12 +172,28 @@ class Fit(object):
                  verbose=True,
                  fit_method='Likelihood',
                  estimate_discrete=True,
+                 zeta_table=False,
                  discrete_approximation='round',
                  sigma_threshold=None,
                  parameter_range=None,
                  fit_optimizer=None,
+                 fit_starts=1,
                  xmin_distance='D',
                  xmin_distribution='power_law',
+                 xmin_scan_memory=2**23,
+                 n_jobs=1,
+                 xmin_executor=None,
+                 xmin_backend=None,
+                 search_strategy='exhaustive',
+                 xmin_bins=1000,
+                 xmin_refinement_radius=1,
+                 xmin_candidate_budget=None,
+                 xmin_deadline=None,
+                 xmin_sweep=False,
+                 xmin_min_tail=None,
+                 xmin_profiles=('D', 'V', 'Kappa', 'Asquare'),
+                 xmin_progress=None,
+                 xmin_progress_interval=.5,
                  **kwargs):
 
         self.data_original = data
@@ -86,9 +208,12 @@ class Fit(object):
 
         self.fit_method = fit_method
         self.estimate_discrete = estimate_discrete
+        self.zeta_table = zeta_table
         self.discrete_approximation = discrete_approximation
         self.sigma_threshold = sigma_threshold
         self.parameter_range = parameter_range
+        self.fit_optimizer = fit_optimizer
+        self.fit_starts = fit_starts
 
         self.given_xmin = xmin
         self.given_xmax = xmax
@@ -96,6 +221,24 @@ class Fit(object):
         self.xmax = self.given_xmax
 
         self.xmin_distance = xmin_distance
+        self.xmin_scan_memory = xmin_scan_memory
+        self.n_jobs = n_jobs
+        self.xmin_executor = xmin_executor
+        self.xmin_backend = _xmin_backend(xmin_backend, xmin_executor)
+        self.search_strategy = search_strategy
+        self.xmin_bins = xmin_bins
+        self.xmin_refinement_radius = xmin_refinement_radius
+        self.xmin_candidate_budget = xmin_candidate_budget
+        self.xmin_deadline = xmin_deadline
+        self.xmin_sweep = xmin_sweep
+        self.xmin_min_tail = xmin_min_tail
+        if set(xmin_profiles or ()) - set(('D', 'D_plus', 'D_minus', 'V',
+                                           'Kappa', 'Asquare')):
+            raise ValueError("Unknown distance in xmin_profiles")
+        self.xmin_profiles = xmin_profiles
+        self.xmin_progress = xmin_progress
+        self.xmin_progress_interval = xmin_progress_interval
+        self.verbose = verbose
 
         if 0 in self.data:
             if verbose: print("Values less than or equal to 0 in data. Throwing out 0 or negative values", file=sys.stderr)
@@ -136,8 +279,11 @@ class Fit(object):
                            discrete=self.discrete,
                            fit_method=self.fit_method,
                            estimate_discrete=self.estimate_discrete,
+                           zeta_table=self.zeta_table,
                            data=self.data,
-                           parameter_range=self.parameter_range)
+                           parameter_range=self.parameter_range,
+                           fit_optimizer=self.fit_optimizer,
+                           fit_starts=self.fit_starts)
             setattr(self,self.xmin_distance, getattr(pl, self.xmin_distance))
             self.alpha = pl.alpha
             self.sigma = pl.sigma
@@ -149,9 +295,19 @@ class Fit(object):
                     xmin_distribution.replace('_',' '), file=sys.stderr))
             self.find_xmin()
 
-        self.data = self.data[self.data>=self.xmin]
+        self._n_above_max = n_above_max
+        self._trim_data(self.data)
+
+    def _trim_data(self, data):
+        """
+        Keeps the sorted data at and above xmin for fitting. It is a view of
+        all the data within xmax, so reselect_xmin can use another xmin.
+        """
+        from numpy import searchsorted
+        self._all_data = data
+        self.data = data[searchsorted(data, self.xmin, side='left'):]
         self.n = float(len(self.data))
-        self.n_tail = self.n + n_above_max
+        self.n_tail = self.n + self._n_above_max
 
     def __getattr__(self, name):
         if name in self.supported_distributions.keys():
@@ -171,8 +327,11 @@ class Fit(object):
                          discrete=self.discrete,
                          fit_method=self.fit_method,
                          estimate_discrete=self.estimate_discrete,
+                         zeta_table=self.zeta_table,
                          discrete_approximation=self.discrete_approximation,
                          parameter_range=parameter_range,
+                         fit_optimizer=self.fit_optimizer,
+                         fit_starts=self.fit_starts,
                          parent_Fit=self))
             return getattr(self, name)
         else:
@@ -187,8 +346,20 @@ class Fit(object):
         best is identified by minimizing the Kolmogorov-Smirnov distance
         between the data and the theoretical power law fit.
         This is the method of Clauset et al. 2007.
+
+        How the search was run is recorded in self.xmin_diagnostics: the
+        backend ('serial', 'processes' or 'threads'), the number of workers
+        and chunks of candidates, the elapsed time, the time spent waiting on
+        the workers and the time they spent working, and the speedup, which
+        is the estimated time of a serial search over the elapsed time.
         """
-        from numpy import unique, asarray, argmin, nan, repeat, arange
+        with self._xmin_search_diagnostics() as start_time:
+            return self._find_xmin(xmin_distance, start_time)
+
+    def _find_xmin(self, xmin_distance, start_time):
+        from numpy import unique, asarray, nan, arange, full, zeros, \
+            searchsorted, sort, isnan, fmin
+        from time import perf_counter
 #Much of the rest of this function was inspired by Adam Ginsburg's plfit code,
 #specifically the mapping and sigma threshold behavior:
 #http://code.google.com/p/agpy/source/browse/trunk/plfit/plfit.py?spec=svn359&r=357
@@ -198,10 +369,17 @@ class Fit(object):
             possible_ind = min(self.given_xmin)<=self.data
             possible_ind *= self.data<=max(self.given_xmin)
             possible_xmins = self.data[possible_ind]
+        if self.search_strategy=='binned' and len(possible_xmins):
+            possible_xmins = self._binned_xmin_region(possible_xmins)
         xmins, xmin_indices = unique(possible_xmins, return_index=True)
 #Don't look at last xmin, as that's also the xmax, and we want to at least have TWO points to fit!
         xmins = xmins[:-1]
         xmin_indices = xmin_indices[:-1]
+        if self.xmin_min_tail:
+#Tails only shrink as xmin grows, so this stops the search at the first
+#candidate whose tail is too small
+            xmins = xmins[len(self.data) - searchsorted(self.data, xmins) >=
+                          self.xmin_min_tail]
 
         if xmin_distance is None:
             xmin_distance = self.xmin_distance
@@ -226,63 +404,715 @@ class Fit(object):
             self.noise_flag = True
             return self.xmin
 
-        def fit_function(xmin, idx, num_xmins):
-            print('xmin progress: {:02d}%'.format(int(idx/num_xmins * 100)), end='\r')
-            pl = self.xmin_distribution(xmin=xmin,
-                           xmax=self.xmax,
-                           discrete=self.discrete,
-                           estimate_discrete=self.estimate_discrete,
-                           fit_method=self.fit_method,
-                           data=self.data,
-                           parameter_range=self.parameter_range,
-                           parent_Fit=self)
-            if not hasattr(pl, 'sigma'):
-                pl.sigma = nan
-            if not hasattr(pl, 'alpha'):
-                pl.alpha = nan
-            return getattr(pl, xmin_distance), pl.alpha, pl.sigma, pl.in_range()
+#The distance that chooses xmin comes first, followed by the others to keep
+        distances = (xmin_distance,) + tuple(
+            name for name in (self.xmin_profiles or ()) if name!=xmin_distance)
 
         num_xmins = len(xmins)
-        fits = asarray(list(map(fit_function, xmins, arange(num_xmins), repeat(num_xmins, num_xmins))))
+#Candidates that are not evaluated keep distances of nan and are never
+#selected. The columns are the first distance, alpha, sigma, whether the fit
+#is in range, and then the other distances.
+        fits = full((num_xmins, 3+len(distances)), nan)
+        fits[:,3] = 0
+        evaluated = zeros(num_xmins, dtype=bool)
+
+        callback = self.xmin_progress
+        if callback is None and self.verbose:
+            callback = _print_xmin_progress
+#The time of the last report, and the smallest distance of a good fit so far
+        progress_state = [None, nan]
+
+        def report(new_fits=None, n_new=0, force=False):
+            if new_fits is not None and len(new_fits):
+                new_fits = asarray(new_fits, dtype='float')
+                good_values = _good_xmins(new_fits[:,3].astype(bool),
+                                          new_fits[:,2], self.sigma_threshold)
+                good_values *= ~isnan(new_fits[:,0])
+                if good_values.any():
+                    progress_state[1] = fmin(progress_state[1],
+                                             new_fits[good_values,0].min())
+            if callback is None:
+                return
+            now = perf_counter()
+            if (not force and progress_state[0] is not None and
+                    now - progress_state[0] < self.xmin_progress_interval):
+                return
+            progress_state[0] = now
+            callback(int(evaluated.sum()) + n_new, num_xmins,
+                     progress_state[1], now - start_time)
+
+        def fit_function(xmin, idx, num_xmins):
+            options = self._xmin_fit_options()
+            del options['sweep']
+            fit = _fit_xmin_candidate(self, xmin, distances, **options)
+            report((fit,))
+            return fit
+
+        def evaluate_batch(candidates):
+#In increasing order, so that a sweep fits neighboring candidates in turn
+            candidates = sort(candidates)
+            candidate_xmins = xmins[candidates]
+            if self._vectorized_xmin_search(xmin_distance):
+                candidate_fits = self._power_law_xmin_scan(
+                    candidate_xmins, distances, fit_function)
+            elif self._parallel_xmin_search() and self.xmin_backend=='processes':
+                candidate_fits = self._parallel_xmin_fits(candidate_xmins,
+                                                          distances)
+            else:
+                candidate_fits = asarray(_fit_xmin_candidates(
+                    self, candidate_xmins, distances,
+                    progress=lambda idx, n, fit: report((fit,), idx+1),
+                    **self._xmin_fit_options()))
+            fits[candidates] = candidate_fits
+            evaluated[candidates] = True
+            report(candidate_fits)
+
+        if self.xmin_deadline is None:
+            evaluate = evaluate_batch
+        else:
+            deadline = start_time + self.xmin_deadline
+            spent = [0.0, 0]
+
+            def evaluate(candidates):
+#Evaluate in batches expected to take half the time left, so the search
+#stops close to the deadline. The first candidate measures the time each takes.
+                position = 0
+                while position < len(candidates):
+                    remaining = deadline - perf_counter()
+                    if evaluated.any() and remaining <= 0:
+                        raise _Xmin_Deadline
+                    if spent[1]:
+                        per_candidate = spent[0] / spent[1]
+                        if evaluated.any() and remaining < per_candidate:
+                            raise _Xmin_Deadline
+                        batch = max(1, int(.5*remaining/per_candidate))
+                    else:
+                        batch = 1
+                    batch_start = perf_counter()
+                    evaluate_batch(candidates[position:position+batch])
+                    spent[0] += perf_counter() - batch_start
+                    spent[1] += len(candidates[position:position+batch])
+                    position += batch
+
+        if self.search_strategy not in ('exhaustive', 'adaptive', 'binned'):
+            raise ValueError("search_strategy must be 'exhaustive', "
+                             "'adaptive' or 'binned'")
+        self.xmin_search_truncated = False
+        if self.xmin_deadline is None:
+            if self.search_strategy!='adaptive':
+                evaluate(arange(num_xmins))
+            else:
+                self._adaptive_xmin_search(xmins, fits, evaluated, evaluate)
+        else:
+#Cover the whole range evenly in quantiles of the data, refine around the
+#best candidates, and then, for the exhaustive search, fill in the rest from
+#coarse to fine
+            data_indices = searchsorted(self.data, xmins)
+            try:
+                self._adaptive_xmin_search(
+                    xmins, fits, evaluated, evaluate,
+                    spacing=lambda n: _quantile_spaced_candidates(
+                        data_indices, len(self.data), n))
+                remaining = arange(num_xmins)[~evaluated]
+                if self.search_strategy!='adaptive' and len(remaining):
+                    evaluate(remaining[_coarse_to_fine_order(len(remaining))])
+            except _Xmin_Deadline:
+                self.xmin_search_truncated = True
+        self.xmin_coverage = evaluated.mean()
+        report(force=True)
         # logging.warning(fits.shape)
         setattr(self, xmin_distance+'s', fits[:,0])
+        for column, name in enumerate(distances[1:], 4):
+            setattr(self, name+'s', fits[:,column])
         self.alphas = fits[:,1]
         self.sigmas = fits[:,2]
         self.in_ranges = fits[:,3].astype(bool)
         self.xmins = xmins
+        self.xmins_evaluated = evaluated
 
-        good_values = self.in_ranges
-
-        if self.sigma_threshold:
-            good_values = good_values * (self.sigmas < self.sigma_threshold)
-
-        if good_values.all():
-            min_D_index = argmin(getattr(self, xmin_distance+'s'))
-            self.noise_flag = False
-        elif not good_values.any():
-            min_D_index = argmin(getattr(self, xmin_distance+'s'))
-            self.noise_flag = True
-        else:
-            from numpy.ma import masked_array
-            masked_Ds = masked_array(getattr(self, xmin_distance+'s'), mask=~good_values)
-            min_D_index = masked_Ds.argmin()
-            self.noise_flag = False
+        good_values = _good_xmins(self.in_ranges, self.sigmas,
+                                  self.sigma_threshold)
+        min_D_index, self.noise_flag = _select_xmin(
+            getattr(self, xmin_distance+'s'), good_values, evaluated)
 
         if self.noise_flag:
             print("No valid fits found.", file=sys.stderr)
 
-        #Set the Fit's xmin to the optimal xmin
-        self.xmin = xmins[min_D_index]
-        setattr(self, xmin_distance, getattr(self, xmin_distance+'s')[min_D_index])
-        self.alpha = self.alphas[min_D_index]
-        self.sigma = self.sigmas[min_D_index]
+        self._set_xmin(min_D_index)
+
+        return self.xmin
+
+    def _set_xmin(self, index):
+        """
+        Sets the Fit's xmin to the candidate at index in self.xmins, with the
+        distances and parameters found for it.
+        """
+        self.xmin = self.xmins[index]
+        for distance in ('D', 'D_plus', 'D_minus', 'V', 'Kappa', 'Asquare'):
+            if distance+'s' in self.__dict__:
+                setattr(self, distance, getattr(self, distance+'s')[index])
+        self.alpha = self.alphas[index]
+        self.sigma = self.sigmas[index]
 
         #Update the fitting CDF given the new xmin, in case other objects, like
         #Distributions, want to use it for fitting (like if they do KS fitting)
         self.fitting_cdf_bins, self.fitting_cdf = self.cdf()
 
+    def reselect_xmin(self, sigma_threshold=None, parameter_range=None,
+                      xmin_distance=None):
+        """
+        Chooses the optimal xmin again from the candidates already evaluated
+        by find_xmin, under a new sigma_threshold, parameter_range or
+        xmin_distance, without fitting again. The Fit's xmin, alpha, sigma,
+        distances and data are updated, and distributions created from the
+        Fit are discarded, to be created again with the new xmin.
+
+        Parameters
+        ----------
+        sigma_threshold : float, optional
+            Upper limit on the standard error of the power law fit. None
+            keeps the Fit's current sigma_threshold.
+        parameter_range : dict, optional
+            Ranges of valid 'alpha' and/or 'sigma' for the power law fit.
+            None keeps the current validity of each candidate. Candidates
+            whose cached fits are out of the range are treated as invalid,
+            rather than fitted again within it as a new Fit would do. The
+            cached fits of candidates that were out of an earlier
+            parameter_range are those constrained to it.
+        xmin_distance : str, optional
+            The distance to minimize, whose values for each candidate must
+            have been calculated by the search. None keeps the Fit's current
+            xmin_distance.
+
+        Returns
+        -------
+        xmin : float
+        """
+        if self.fixed_xmin or 'xmins' not in self.__dict__:
+            raise ValueError("No xmin search to reselect from.")
+        if xmin_distance is None:
+            xmin_distance = self.xmin_distance
+        if xmin_distance+'s' not in self.__dict__:
+            raise ValueError("The xmin search did not calculate {} for each "
+                             "candidate.".format(xmin_distance))
+        if sigma_threshold is not None:
+            self.sigma_threshold = sigma_threshold
+        if parameter_range is not None:
+            if (self.xmin_distribution != Power_Law or
+                    type(parameter_range)!=dict or
+                    not set(parameter_range.keys()) <= set(('alpha', 'sigma'))):
+                raise ValueError("parameter_range can only be changed for "
+                                 "ranges of the power law's alpha and sigma.")
+            self.parameter_range = parameter_range
+            self.in_ranges = _power_law_in_range(self.alphas, self.sigmas,
+                                                 parameter_range)
+        self.xmin_distance = xmin_distance
+
+        good_values = _good_xmins(self.in_ranges, self.sigmas,
+                                  self.sigma_threshold)
+        index, self.noise_flag = _select_xmin(
+            getattr(self, xmin_distance+'s'), good_values, self.xmins_evaluated)
+        if self.noise_flag:
+            print("No valid fits found.", file=sys.stderr)
+
+#Return to all the data to find the new tail
+        self.data = self._all_data
+        self._set_xmin(index)
+        self._trim_data(self._all_data)
+        for name in self.supported_distributions.keys():
+            if name in self.__dict__:
+                delattr(self, name)
         return self.xmin
 
+    def find_xmin_xmax(self, xmin_distance=None, n_xmaxs=32, min_points=10):
+        """
+        Returns the optimal window of the data, between an xmin and an xmax,
+        in which a continuous power law fits best. The power law fitted to
+        each window is truncated to it, and the distance between it and the
+        data in the window is minimized over both xmin and xmax. The Fit's
+        xmin, xmax, alpha, sigma and distance are set, its data is trimmed
+        to the window, and distributions created from the Fit are discarded,
+        to be created again within it. Like any power law with an xmax, they
+        are truncated to the window only with a fit_optimizer.
+
+        The candidate xmins and xmaxs are the unique values of the data
+        within the Fit's xmax, if it has one, and its range of xmins, if it
+        was given one. For each candidate xmax evaluated, the windows with
+        all the xmins below it are fitted at once, in constant time each,
+        from cumulative sums of log(data). Windows with fewer than
+        min_points data points, or whose fits are invalid, are pruned before
+        their distances are calculated. n_xmaxs log-spaced xmaxs are
+        evaluated first, and then the xmaxs between the best few local
+        minima and their evaluated neighbors, coarse to fine, until the
+        neighbors are adjacent. Sets of xmaxs are evaluated in parallel
+        according to n_jobs, xmin_executor and xmin_backend, as in
+        find_xmin, and the search is recorded in self.xmin_diagnostics.
+
+        The two-dimensional profile of the search is kept in self.xmaxs, the
+        evaluated xmaxs in increasing order, and in self.window_Ds (named
+        after xmin_distance), self.window_alphas and self.window_sigmas,
+        with one row per xmax and one column per candidate in self.xmins.
+        Pruned windows have a distance of nan. The one-dimensional profiles,
+        like self.Ds and self.alphas, are those at the chosen xmax, from
+        which reselect_xmin can choose another xmin.
+
+        Parameters
+        ----------
+        xmin_distance : str, optional
+            The distance to minimize, one of 'D', 'D_plus', 'D_minus', 'V',
+            'Kappa' and 'Asquare'. None uses the Fit's xmin_distance.
+        n_xmaxs : int, optional
+            The number of xmaxs evaluated at first, and at most in each
+            neighborhood being refined. 32 by default.
+        min_points : int, optional
+            The smallest number of data points in a window. 10 by default.
+
+        Returns
+        -------
+        xmin : float
+        xmax : float
+        """
+        if self.discrete or self.xmin_distribution != Power_Law:
+            raise ValueError("The xmin and xmax can only be searched for "
+                             "together for continuous power laws.")
+        if self.fixed_xmin:
+            raise ValueError("The xmin is fixed.")
+        if xmin_distance is None:
+            xmin_distance = self.xmin_distance
+        with self._xmin_search_diagnostics():
+            return self._find_xmin_xmax(xmin_distance, n_xmaxs, min_points)
+
+    def _find_xmin_xmax(self, xmin_distance, n_xmaxs, min_points):
+        from numpy import unique, searchsorted, log, cumsum, concatenate, \
+            arange, flatnonzero, empty, full, isnan, fmin, nanargmin, \
+            unravel_index
+        from time import perf_counter
+        data = self._all_data
+        log_sums = concatenate(([0.], cumsum(log(data))))
+        bins, Actual_CDF = cdf(data)
+        xmins = bins[:-1]
+        if self.given_xmin:
+            xmins = xmins[(min(self.given_xmin)<=xmins) *
+                          (xmins<=max(self.given_xmin))]
+#The smallest xmax worth evaluating has min_points at or below it
+        xmaxs = bins[searchsorted(bins, data[min(max(min_points, 2),
+                                                 len(data))-1]):]
+        xmaxs = xmaxs[xmaxs>xmins[0]] if len(xmins) else xmaxs[:0]
+        num_xmaxs = len(xmaxs)
+        if not num_xmaxs:
+            print("No window has enough data points to fit.",
+                  file=sys.stderr)
+            self.noise_flag = True
+            return self.xmin, self.xmax
+
+        profiles = empty((3, num_xmaxs, len(xmins)))
+        evaluated = full(num_xmaxs, False)
+        options = {'parameter_range': self.parameter_range,
+                   'sigma_threshold': self.sigma_threshold,
+                   'min_points': min_points,
+                   'distance': xmin_distance,
+                   'memory': self.xmin_scan_memory}
+        shared = None
+        if self._parallel_xmin_search() and self.xmin_backend!='threads':
+            shared, description = _share_arrays((data, log_sums, bins,
+                                                 Actual_CDF))
+
+        def evaluate(candidates):
+            candidates = candidates[~evaluated[candidates]]
+            if not len(candidates):
+                return
+            if self._parallel_xmin_search():
+#The cost of each xmax is proportional to the number of windows below it
+#times their width
+                positions = searchsorted(bins, xmaxs[candidates])
+                chunks = _split_candidates((positions + 1.)**2, self.n_jobs,
+                                           self.xmin_executor)
+                batch_start = perf_counter()
+                if shared is None:
+                    results, work_time = _map_chunks(
+                        _power_law_window_scan,
+                        [(data, log_sums, bins, Actual_CDF, xmins,
+                          xmaxs[candidates[chunk]], options['parameter_range'],
+                          options['sigma_threshold'], min_points,
+                          xmin_distance, options['memory'])
+                         for chunk in chunks],
+                        self.n_jobs, self.xmin_executor, 'threads')
+                else:
+                    results, work_time = _map_chunks(
+                        _window_scan_worker,
+                        [(description, xmins, xmaxs[candidates[chunk]],
+                          options)
+                         for chunk in chunks],
+                        self.n_jobs, self.xmin_executor)
+                self._record_parallel_search(len(chunks),
+                                             perf_counter() - batch_start,
+                                             work_time)
+                results = concatenate(results, axis=1)
+            else:
+                results = _power_law_window_scan(data, log_sums, bins,
+                                                 Actual_CDF, xmins,
+                                                 xmaxs[candidates], **options)
+            profiles[:,candidates] = results
+            evaluated[candidates] = True
+
+        try:
+            evaluate(_log_spaced_candidates(xmaxs, arange(num_xmaxs),
+                                            n_xmaxs))
+            while True:
+                done = flatnonzero(evaluated)
+                scores = fmin.reduce(profiles[0, done], axis=1)
+                valid = flatnonzero(~isnan(scores))
+                if not len(valid):
+                    break
+#Refine around the best few local minima over the evaluated xmaxs
+                minima = [position for position in valid
+                          if all(isnan(scores[neighbor]) or
+                                 scores[neighbor] >= scores[position]
+                                 for neighbor in (position-1, position+1)
+                                 if 0 <= neighbor < len(done))]
+                minima = sorted(minima, key=lambda position: scores[position])
+                new = []
+                for position in minima[:3]:
+                    lower = done[max(position-1, 0)]
+                    upper = done[min(position+1, len(done)-1)]
+                    neighborhood = arange(lower, upper+1)
+                    neighborhood = neighborhood[~evaluated[neighborhood]]
+                    if len(neighborhood):
+                        new.append(_log_spaced_candidates(xmaxs, neighborhood,
+                                                          n_xmaxs))
+                if not new:
+                    break
+                evaluate(unique(concatenate(new)))
+        finally:
+            if shared is not None:
+                shared.close()
+                shared.unlink()
+
+        self.xmaxs = xmaxs[evaluated]
+        window_distances, window_alphas, window_sigmas = profiles[:,evaluated]
+        setattr(self, 'window_'+xmin_distance+'s', window_distances)
+        self.window_alphas = window_alphas
+        self.window_sigmas = window_sigmas
+
+        self.noise_flag = bool(isnan(window_distances).all())
+        if self.noise_flag:
+            print("No valid fits found.", file=sys.stderr)
+            return self.xmin, self.xmax
+        row, index = unravel_index(nanargmin(window_distances),
+                                   window_distances.shape)
+
+#The one dimensional profiles over xmin at the chosen xmax
+        self.xmax = self.xmaxs[row]
+        self.xmin_distance = xmin_distance
+        for distance in ('D', 'D_plus', 'D_minus', 'V', 'Kappa', 'Asquare'):
+            if distance+'s' in self.__dict__:
+                delattr(self, distance+'s')
+        setattr(self, xmin_distance+'s', window_distances[row])
+        self.alphas = window_alphas[row]
+        self.sigmas = window_sigmas[row]
+        self.xmins = xmins
+        self.xmins_evaluated = ~isnan(self.alphas)
+        self.in_ranges = self.xmins_evaluated * _power_law_in_range(
+            self.alphas, self.sigmas, self.parameter_range)
+
+        stop = searchsorted(data, self.xmax, side='right')
+        self._n_above_max += len(data) - stop
+        self.data = data[:stop]
+        self._set_xmin(index)
+        self._trim_data(data[:stop])
+        for name in self.supported_distributions.keys():
+            if name in self.__dict__:
+                delattr(self, name)
+        return self.xmin, self.xmax
+
+    def _binned_xmin_region(self, possible_xmins):
+        """
+        The possible xmins in the bins on either side of the bin edge with
+        the smallest approximate D, from _power_law_binned_scan. Sets the
+        binned approximations and the bound on their error.
+        """
+        from numpy import searchsorted
+        if (self.discrete or self.xmax or
+                self.xmin_distribution != Power_Law):
+            raise ValueError("The binned xmin search is only for continuous "
+                             "power laws without an xmax.")
+        positions, alphas, sigmas, Ds, D_errors = _power_law_binned_scan(
+            self.data, self.xmin_bins, possible_xmins[0], possible_xmins[-1],
+            memory=self.xmin_scan_memory)
+        self.binned_xmins = self.data[positions]
+        self.binned_alphas = alphas
+        self.binned_sigmas = sigmas
+        self.binned_Ds = Ds
+        self.binned_D_errors = D_errors
+        if not len(positions):
+            self.xmin_D_error = 0.0
+            return possible_xmins[:0]
+
+        good_values = _good_xmins(
+            _power_law_in_range(alphas, sigmas, self.parameter_range),
+            sigmas, self.sigma_threshold)
+        if self.xmin_min_tail:
+            good_values *= len(self.data) - positions >= self.xmin_min_tail
+        index = _select_xmin(Ds, good_values)[0]
+        self.xmin_D_error = D_errors[index]
+#The candidates from the previous edge up to the next one. The next edge's
+#candidate is left out of the search with the last of the candidates.
+        lower = self.data[positions[max(index-1, 0)]]
+        if index+1 < len(positions):
+            upper = self.data[positions[index+1]]
+        else:
+            upper = self.data[-1]
+        return possible_xmins[searchsorted(possible_xmins, lower):
+                              searchsorted(possible_xmins, upper, 'right')]
+
+    def _adaptive_xmin_search(self, xmins, fits, evaluated, evaluate,
+                              spacing=None):
+        """
+        Evaluates log-spaced candidate xmins, then repeatedly refines around
+        the best few separate minima among them, evaluating the candidates
+        between each and its evaluated neighbors within
+        xmin_refinement_radius. The search stops when these neighborhoods
+        have no candidates left to evaluate, or when xmin_candidate_budget
+        candidates have been evaluated.
+
+        fits and evaluated are filled in by evaluate(candidates), which takes
+        the indices of candidates in xmins. spacing(n), if given, returns
+        the indices of the n candidates to evaluate first instead of
+        log-spaced ones.
+        """
+        from numpy import arange, flatnonzero, argsort, sqrt, concatenate, \
+            unique
+        num_xmins = len(xmins)
+        budget = self.xmin_candidate_budget or num_xmins
+        radius = max(1, int(self.xmin_refinement_radius))
+#How many candidates to evaluate at once over the whole range, and then in
+#each neighborhood being refined
+        n_spaced = int(min(budget, max(32, sqrt(num_xmins))))
+
+        if spacing is None:
+            evaluate(_log_spaced_candidates(xmins, arange(num_xmins),
+                                            n_spaced))
+        else:
+            evaluate(spacing(n_spaced))
+        while evaluated.sum() < budget:
+            done = flatnonzero(evaluated)
+            good_values = _good_xmins(fits[done,3].astype(bool),
+                                      fits[done,2], self.sigma_threshold)
+            if not good_values.any():
+                good_values[:] = True
+            ranked = flatnonzero(good_values)
+            ranked = ranked[argsort(fits[done[ranked],0], kind='stable')]
+
+            new = []
+            refined = []
+            for position in ranked:
+                if len(refined)==3:
+                    break
+#Refine the best few separate minima, not several points of the same one
+                if any(abs(position-other) <= radius for other in refined):
+                    continue
+                refined.append(position)
+                lower = done[max(position-radius, 0)]
+                upper = done[min(position+radius, len(done)-1)]
+                neighborhood = arange(lower, upper+1)
+                neighborhood = neighborhood[~evaluated[neighborhood]]
+                if len(neighborhood):
+                    new.append(_log_spaced_candidates(xmins, neighborhood,
+                                                      n_spaced))
+            if not new:
+                break
+#Neighborhoods of the best candidates come first if the budget runs out
+            new = concatenate(new)
+            new = new[sorted(unique(new, return_index=True)[1])]
+            evaluate(sorted(new[:budget-evaluated.sum()]))
+
+    def _parallel_xmin_search(self):
+        """
+        Whether the xmin search is split among several workers.
+        """
+        return self.n_jobs!=1 or self.xmin_executor is not None
+
+    @contextmanager
+    def _xmin_search_diagnostics(self):
+        """
+        Records the xmin search run within it in self.xmin_diagnostics,
+        starting from a serial search, to which _record_parallel_search adds
+        the parallel parts. Yields the time the search started, from
+        time.perf_counter.
+        """
+        from time import perf_counter
+        start_time = perf_counter()
+        self.xmin_diagnostics = {'backend': 'serial',
+                                 'n_workers': 1,
+                                 'n_chunks': 1,
+                                 'parallel_time': 0.0,
+                                 'work_time': 0.0}
+        yield start_time
+        elapsed = perf_counter() - start_time
+        diagnostics = self.xmin_diagnostics
+        diagnostics['elapsed'] = elapsed
+        diagnostics['speedup'] = (elapsed - diagnostics['parallel_time']
+                                  + diagnostics['work_time']) / elapsed
+
+    def _record_parallel_search(self, n_chunks, parallel_time, work_time):
+        diagnostics = self.xmin_diagnostics
+        if diagnostics['backend']=='serial':
+            diagnostics['n_chunks'] = 0
+        diagnostics['backend'] = self.xmin_backend
+        diagnostics['n_workers'] = _n_workers(self.n_jobs, self.xmin_executor)
+        diagnostics['n_chunks'] += n_chunks
+        diagnostics['parallel_time'] += parallel_time
+        diagnostics['work_time'] += work_time
+
+    def _vectorized_xmin_search(self, xmin_distance):
+        """
+        Whether the candidate xmins can all be evaluated at once from the
+        sorted data, instead of fitting a Power_Law object for each one. This
+        is the case for maximum likelihood fits of continuous power laws
+        without an xmax, and of discrete power laws.
+        """
+        if self.xmin_distribution != Power_Law:
+            return False
+        if self.fit_method != 'Likelihood':
+            return False
+        if self.xmax and not self.discrete:
+            return False
+        if xmin_distance not in ('D', 'D_plus', 'D_minus', 'V', 'Kappa',
+                                 'Asquare'):
+            return False
+        if self.parameter_range:
+            if type(self.parameter_range)!=dict:
+                return False
+            if not set(self.parameter_range.keys()) <= set(('alpha', 'sigma')):
+                return False
+        return True
+
+    def _power_law_xmin_scan(self, xmins, distances, fit_function):
+        """
+        Evaluates every candidate xmin at once. The maximum likelihood alpha,
+        sigma and number of data points in the tail come from reverse
+        cumulative sums of log(data), and the distance between the data and
+        each fit comes from the Fit's CDF. Candidates whose fit is out of the
+        valid parameter range are refit with fit_function, which uses the
+        Power_Law object just as the serial search does.
+
+        Returns
+        -------
+        fits : array
+            One row per candidate xmin, with the columns the first of
+            distances, alpha, sigma, whether the fit is in range, and the
+            rest of distances.
+        """
+        from numpy import searchsorted, empty, arange, concatenate
+        from time import perf_counter
+        xmin_indices = searchsorted(self.data, xmins, side='left')
+        alphas, sigmas, n_tails = _power_law_alpha_scan(
+            self.data, xmin_indices, discrete=self.discrete,
+            estimate_discrete=self.estimate_discrete, xmax=self.xmax,
+            zeta_table=self.zeta_table)
+
+        in_ranges = _power_law_in_range(alphas, sigmas, self.parameter_range)
+
+        options = {'discrete': self.discrete,
+                   'distances': distances,
+                   'memory': self.xmin_scan_memory,
+                   'xmax': self.xmax}
+        if self._parallel_xmin_search():
+#The cost of each candidate is proportional to the size of its tail
+            chunks = _split_candidates(
+                len(self.fitting_cdf_bins) - searchsorted(self.fitting_cdf_bins, xmins),
+                self.n_jobs, self.xmin_executor)
+            start_time = perf_counter()
+            if self.xmin_backend=='threads':
+#Threads read the Fit's arrays directly. The scan is array code that only
+#writes to its own blocks, so the threads share no state.
+                results, work_time = _map_chunks(
+                    _power_law_ks_scan,
+                    [(self.fitting_cdf_bins, self.fitting_cdf, xmins[chunk],
+                      alphas[chunk], options['discrete'],
+                      options['distances'], options['memory'],
+                      options['xmax'])
+                     for chunk in chunks],
+                    self.n_jobs, self.xmin_executor, 'threads')
+            else:
+                shared, description = _share_arrays(
+                    (self.fitting_cdf_bins, self.fitting_cdf))
+                try:
+                    results, work_time = _map_chunks(
+                        _ks_scan_worker,
+                        [(description, xmins[chunk], alphas[chunk], options)
+                         for chunk in chunks],
+                        self.n_jobs, self.xmin_executor)
+                finally:
+                    shared.close()
+                    shared.unlink()
+            self._record_parallel_search(len(chunks),
+                                         perf_counter() - start_time,
+                                         work_time)
+            results = dict((name, concatenate([result[name]
+                                               for result in results]))
+                           for name in distances)
+        else:
+            results = _power_law_ks_scan(self.fitting_cdf_bins,
+                                         self.fitting_cdf, xmins, alphas,
+                                         **options)
+
+        num_xmins = len(xmins)
+        fits = empty((num_xmins, 3+len(distances)))
+        fits[:,0] = results[distances[0]]
+        fits[:,1] = alphas
+        fits[:,2] = sigmas
+        fits[:,3] = in_ranges
+        for column, name in enumerate(distances[1:], 4):
+            fits[:,column] = results[name]
+        for idx in arange(num_xmins)[~in_ranges]:
+            fits[idx] = fit_function(xmins[idx], idx, num_xmins)
+        return fits
+
+    def _xmin_fit_options(self):
+        """
+        The options with which a distribution is fitted to the tail above each
+        candidate xmin.
+        """
+        return {'distribution': self.xmin_distribution,
+                'sweep': self.xmin_sweep,
+                'xmax': self.xmax,
+                'discrete': self.discrete,
+                'estimate_discrete': self.estimate_discrete,
+                'zeta_table': self.zeta_table,
+                'fit_method': self.fit_method,
+                'parameter_range': self.parameter_range,
+                'fit_optimizer': self.fit_optimizer,
+                'fit_starts': self.fit_starts}
+
+    def _parallel_xmin_fits(self, xmins, distances):
+        """
+        Fits a distribution to the tail above each candidate xmin, splitting
+        the candidates among worker processes. The data is published once
+        through shared memory. Each worker fits exactly as the serial search
+        does, so the results are identical.
+        """
+        from numpy import asarray, searchsorted
+        from time import perf_counter
+        chunks = _split_candidates(
+            len(self.data) - searchsorted(self.data, xmins),
+            self.n_jobs, self.xmin_executor)
+        start_time = perf_counter()
+        shared, description = _share_arrays(
+            (self.data, self.fitting_cdf_bins, self.fitting_cdf))
+        try:
+            results, work_time = _map_chunks(_xmin_fits_worker,
+                                             [(description, xmins[chunk],
+                                               distances,
+                                               self._xmin_fit_options())
+                                              for chunk in chunks],
+                                             self.n_jobs, self.xmin_executor)
+        finally:
+            shared.close()
+            shared.unlink()
+        self._record_parallel_search(len(chunks), perf_counter() - start_time,
+                                     work_time)
+        return asarray([fit for result in results for fit in result])
 
     def nested_distribution_compare(self, dist1, dist2, nested=True, **kwargs):
         """
@@ -343,12 +1173,17 @@ class Fit(object):
         dist1 = getattr(self, dist1)
         dist2 = getattr(self, dist2)
 
-        loglikelihoods1 = dist1.loglikelihoods(self.data)
-        loglikelihoods2 = dist2.loglikelihoods(self.data)
+#Discrete data is compared on its unique values, weighted by their counts
+        if self.discrete:
+            data, inverse, counts = _unique_values(self.data)
+        else:
+            data, counts = self.data, None
+        loglikelihoods1 = dist1.loglikelihoods(data)
+        loglikelihoods2 = dist2.loglikelihoods(data)
 
         return loglikelihood_ratio(
             loglikelihoods1, loglikelihoods2,
-            nested=nested,
+            nested=nested, counts=counts,
             **kwargs)
 
     def loglikelihood_ratio(self, dist1, dist2, nested=None, **kwargs):
@@ -567,6 +1402,20 @@ class Distribution(object):
         of their lower and upper limits (ex. (1.5, 2.5), (None, .1)
     initial_parameters : tuple or list, optional
         Initial values for the parameter in the fitting search.
+    fit_optimizer : str, optional
+        A method of scipy.optimize.minimize with which to fit the
+        distribution, such as 'L-BFGS-B', 'TNC' or 'trust-constr'. These use
+        the analytic gradient of the log likelihood, if known, and keep the
+        parameters within their valid ranges. With one, a continuous power
+        law with an xmax is normalized between xmin and xmax. Default None,
+        which uses the Nelder-Mead simplex of scipy.optimize.fmin.
+    fit_starts : int, optional
+        The number of starting points for the Nelder-Mead simplex: the
+        initial parameters and others spread about them. The simplices from
+        all the starts are moved in lock step, so each step evaluates the
+        likelihood at all their new points in one call, and the best fit is
+        kept. Default 1, which fits from the initial parameters alone,
+        through the profile likelihood where possible.
 
     discrete_approximation : "round", "xmax" or int, optional
         If the discrete form of the theoeretical distribution is not known,
@@ -587,6 +1436,8 @@ class Distribution(object):
                  parameters=None,
                  parameter_range=None,
                  initial_parameters=None,
+                 fit_optimizer=None,
+                 fit_starts=1,
                  discrete_approximation='round',
                  parent_Fit=None,
                  **kwargs):
@@ -595,6 +1446,8 @@ class Distribution(object):
         self.xmax = xmax
         self.discrete = discrete
         self.fit_method = fit_method
+        self.fit_optimizer = fit_optimizer
+        self.fit_starts = fit_starts
         self.discrete_approximation = discrete_approximation
 
         self.parameter1 = None
@@ -610,12 +1463,14 @@ class Distribution(object):
         if parameters is not None:
             self.parameters(parameters)
 
+#Set before the parameter range, which fits the distribution to its parent
+#Fit's data
+        if initial_parameters is not None:
+            self._given_initial_parameters = initial_parameters
+
         if parameter_range:
             self.parameter_range(parameter_range)
 
-        if initial_parameters:
-            self._given_initial_parameters(initial_parameters)
-
         if (data is not None) and not (parameter_range and self.parent_Fit):
             self.fit(data)
 
@@ -629,7 +1484,20 @@ class Distribution(object):
         if data is None and hasattr(self, 'parent_Fit'):
             data = self.parent_Fit.data
         data = trim_to_range(data, xmin=self.xmin, xmax=self.xmax)
-        if self.fit_method=='Likelihood':
+        from numpy import sum
+#Where the log likelihood depends on the data only through a few statistics,
+#they are calculated once and each evaluation doesn't pass over the data
+        statistics = self._sufficient_statistics(data)
+        if self.fit_method=='Likelihood' and statistics is not None:
+            def fit_function(params):
+                self.parameters(params)
+                return -self._loglikelihood_from_statistics(statistics)
+        elif self.fit_method=='Likelihood' and self.discrete:
+            values, inverse, counts = _unique_values(data)
+            def fit_function(params):
+                self.parameters(params)
+                return -sum(counts*self.loglikelihoods(values))
+        elif self.fit_method=='Likelihood':
             def fit_function(params):
                 self.parameters(params)
                 return -sum(self.loglikelihoods(data))
@@ -638,13 +1506,37 @@ class Distribution(object):
                 self.parameters(params)
                 self.KS(data)
                 return self.D
-        from scipy.optimize import fmin
-        parameters, negative_loglikelihood, iter, funcalls, warnflag, = \
-            fmin(
-                lambda params: fit_function(params),
-                self.initial_parameters(data),
-                full_output=1,
-                disp=False)
+
+        if (self.fit_method=='Likelihood' and self.fit_optimizer is None and
+                self.fit_starts == 1 and
+                hasattr(self, 'profile_parameter') and not self.discrete and
+                not self.xmax and not hasattr(self, '_range_dict') and
+                not hasattr(self, '_in_given_parameter_range')):
+            try:
+                self._profile_fit(data)
+            except RuntimeError:
+                pass
+            else:
+                if self.in_range():
+                    self.noise_flag = False
+                    self.loglikelihood = sum(self.loglikelihoods(data))
+                    self.KS(data)
+                    return
+
+        if self.fit_optimizer is None and self.fit_starts > 1:
+            parameters, negative_loglikelihood = self._multi_start_fit(
+                fit_function, data)
+        elif self.fit_optimizer is None:
+            from scipy.optimize import fmin
+            parameters, negative_loglikelihood, iter, funcalls, warnflag, = \
+                fmin(
+                    lambda params: fit_function(params),
+                    self.initial_parameters(data),
+                    full_output=1,
+                    disp=False)
+        else:
+            parameters, negative_loglikelihood = self._minimize(fit_function,
+                                                                data)
         self.parameters(parameters)
         if not self.in_range():
             self.noise_flag=True
@@ -655,6 +1547,280 @@ class Distribution(object):
         self.loglikelihood =-negative_loglikelihood
         self.KS(data)
 
+    def _minimize(self, fit_function, data):
+        """
+        Minimizes fit_function with the fit_optimizer method of
+        scipy.optimize.minimize, within the bounds of _parameter_bounds. A
+        likelihood fit uses the gradient of _loglikelihood_gradient, if it is
+        known for this distribution and data. Otherwise the optimizer
+        estimates the gradient by finite differences.
+
+        Returns
+        -------
+        parameters : array
+        value : float
+            The minimum of fit_function found.
+        """
+        from numpy import asarray, clip
+        from scipy.optimize import minimize
+        initial_parameters = asarray(self.initial_parameters(data), dtype=float)
+        bounds = self._parameter_bounds()
+        lower = [-float('inf') if b[0] is None else b[0] for b in bounds]
+        upper = [float('inf') if b[1] is None else b[1] for b in bounds]
+        initial_parameters = clip(initial_parameters, lower, upper)
+
+        jac = None
+        if self.fit_method=='Likelihood':
+            self.parameters(initial_parameters)
+            if self._loglikelihood_gradient(data) is not None:
+                def objective(params):
+                    value = fit_function(params)
+                    return value, -self._loglikelihood_gradient(data)
+                jac = True
+        if jac is None:
+            objective = fit_function
+        result = minimize(objective, initial_parameters, jac=jac,
+                          method=self.fit_optimizer, bounds=bounds)
+        return result.x, result.fun
+
+    def _multi_start_fit(self, fit_function, data):
+        """
+        Minimizes fit_function with a Nelder-Mead simplex from each of
+        _starting_parameters, moved in lock step by _batch_nelder_mead. A
+        likelihood fit evaluates all the simplices' points together with
+        _batch_loglikelihoods, if the log likelihood depends on the data only
+        through _batch_statistics. Otherwise fit_function is called for each
+        point.
+
+        Returns
+        -------
+        parameters : array
+        value : float
+            The least minimum of fit_function found from any start.
+        """
+        from numpy import asarray, argmin
+        statistics = None
+        if self.fit_method=='Likelihood':
+            statistics = self._batch_statistics(data)
+        if statistics is not None:
+            def batch_function(parameters):
+                return -self._batch_loglikelihoods(parameters, statistics)
+        else:
+            def batch_function(parameters):
+                return asarray([fit_function(row) for row in parameters])
+        points, values = _batch_nelder_mead(batch_function,
+                                            self._starting_parameters(data))
+        best = argmin(values)
+        return points[best], values[best]
+
+    def _starting_parameters(self, data):
+        """
+        fit_starts sets of starting parameters, one per row: the initial
+        parameters and others spread about them. A parameter with a lower
+        bound in _standard_parameter_bounds is spread by up to a factor of
+        e**2 either way in its distance from the bound, and others by up to
+        twice their magnitude plus one. The spread is the same for every fit.
+        """
+        from numpy import asarray, atleast_1d, exp, concatenate
+        from numpy.random import RandomState
+        initial = atleast_1d(asarray(self.initial_parameters(data),
+                                     dtype=float))
+        offsets = RandomState(0).uniform(-2, 2, (self.fit_starts-1,
+                                                 len(initial)))
+        starts = initial + (abs(initial) + 1)*offsets
+        for i, (name, lower, upper) in enumerate(
+                self._standard_parameter_bounds):
+            if lower is not None and initial[i] > lower:
+                starts[:, i] = lower + (initial[i] - lower)*exp(offsets[:, i])
+        return concatenate(([initial], starts))
+
+    def _batch_statistics(self, data):
+        """
+        The statistics of data, already within xmin and xmax, for
+        _batch_loglikelihoods. None if the log likelihood needs all the data.
+        By default these are the _sufficient_statistics.
+        """
+        return self._sufficient_statistics(data)
+
+    def _batch_loglikelihoods(self, parameters, statistics):
+        """
+        The sum of the log likelihoods of the data with the given
+        _batch_statistics for each row of parameters, a 2D array with one set
+        of the distribution's parameters per row, as
+        _loglikelihood_from_statistics gives for one set. By default the rows
+        are evaluated in turn. Distributions whose log likelihood is a simple
+        function of the parameters evaluate all the rows at once.
+        """
+        from numpy import asarray
+        loglikelihoods = []
+        for row in parameters:
+            self.parameters(row)
+            loglikelihoods.append(
+                self._loglikelihood_from_statistics(statistics))
+        return asarray(loglikelihoods, dtype=float)
+
+    def _batch_in_range(self, parameters):
+        """
+        Whether each row of parameters is within the range of valid
+        parameters, as in_range.
+        """
+        from numpy import asarray
+        in_range = []
+        for row in parameters:
+            self.parameters(row)
+            in_range.append(self.in_range())
+        return asarray(in_range, dtype=bool)
+
+    def _profile_fit(self, data):
+        """
+        Fits the distribution by maximizing its profile log likelihood over
+        profile_parameter, with the other parameters fitted to each value by
+        _profile. The search is over the log of the parameter's distance from
+        the lower end of its standard range, starting from its initial
+        estimate. Every evaluation of the profile is kept in profile_values
+        and profile_loglikelihoods.
+
+        Raises RuntimeError if the profile has no finite maximum, if the other
+        parameters are not finite at it, or if it is not told apart from the
+        lower end of the parameter's range: if the profile near that end is
+        within the 95% likelihood ratio interval of the maximum. That end is
+        where distributions degenerate, as stretched exponentials do with
+        beta->0 and Lambda->inf, and their profiles rise slowly towards it.
+        """
+        from numpy import log, exp, isfinite, asarray, inf, all
+        from scipy.optimize import minimize_scalar
+        statistics = self._profile_statistics(data)
+        names = [bound[0] for bound in self._standard_parameter_bounds]
+        index = names.index(self.profile_parameter)
+        lower = self._standard_parameter_bounds[index][1]
+        initial = self.initial_parameters(data)[index]
+        if not initial > lower:
+            initial = lower + 1
+
+        evaluations = {}
+        def negative_profile(u):
+            value = lower + exp(u)
+            loglikelihood, parameters = self._profile(value, statistics)
+            if not isfinite(loglikelihood):
+                return inf
+            evaluations[value] = (loglikelihood, parameters)
+            return -loglikelihood
+
+        u = log(initial - lower)
+        result = minimize_scalar(negative_profile, bracket=(u, u + .1))
+        if not evaluations or not isfinite(result.fun):
+            raise RuntimeError("No finite maximum of the profile likelihood")
+        values = sorted(evaluations)
+        best = max(values, key=lambda value: evaluations[value][0])
+        if not all(isfinite(evaluations[best][1])):
+            raise RuntimeError("The profile likelihood is greatest where the "
+                               "other parameters are infinite")
+#The drop from the maximum of the 95% likelihood ratio interval, chi2(1)/2
+        edge = lower + (best - lower)*1e-3
+        if (best == values[0] or self._profile(edge, statistics)[0] >
+                evaluations[best][0] - 1.9207):
+            raise RuntimeError("The profile likelihood is greatest at the "
+                               "lower end of the range of " +
+                               self.profile_parameter)
+        self.parameters(evaluations[best][1])
+        self.profile_values = asarray(values)
+        self.profile_loglikelihoods = asarray([evaluations[value][0]
+                                               for value in values])
+
+    def profile_loglikelihood(self, values=None, data=None):
+        """
+        The profile log likelihood of the data: for each value of the
+        parameter named in profile_parameter, the greatest log likelihood
+        with the other parameters fitted to the data. Its drop from the
+        maximum gives likelihood ratio confidence intervals for the parameter.
+        Only for continuous distributions that define profile_parameter.
+
+        Parameters
+        ----------
+        values : list or array, optional
+            The values of the profiled parameter. If not given, returns the
+            values evaluated while fitting, if the distribution was fitted
+            through its profile.
+        data : list or array, optional
+            If not provided, attempts to use the data from the Fit object in
+            which the Distribution object is contained.
+
+        Returns
+        -------
+        values : array
+        loglikelihoods : array
+        """
+        from numpy import asarray
+        if not hasattr(self, 'profile_parameter') or self.discrete:
+            raise ValueError("The profile likelihood is only available for "
+                             "continuous stretched exponential, truncated "
+                             "power law and lognormal distributions.")
+        if values is None:
+            if not hasattr(self, 'profile_values'):
+                raise ValueError("No profile from fitting; give the values "
+                                 "of " + self.profile_parameter + ".")
+            return self.profile_values, self.profile_loglikelihoods
+        if data is None and hasattr(self, 'parent_Fit'):
+            data = self.parent_Fit.data
+        data = trim_to_range(data, xmin=self.xmin, xmax=self.xmax)
+        statistics = self._profile_statistics(data)
+        values = asarray(values, dtype='float')
+        return values, asarray([self._profile(value, statistics)[0]
+                                for value in values])
+
+    def _parameter_bounds(self):
+        """
+        The bounds on each parameter while fitting, as (lower, upper) pairs
+        with None where there is no bound. These are the standard range of
+        each parameter, in _standard_parameter_bounds, narrowed by any
+        parameter_range given for the same attributes. As the parameters must
+        be strictly within these, each bound is moved inwards by one step of
+        floating point.
+        """
+        from numpy import nextafter, inf
+        bounds = []
+        for name, lower, upper in self._standard_parameter_bounds:
+            if name in getattr(self, '_range_dict', {}):
+                given_lower, given_upper = self._range_dict[name]
+                if given_lower is not None:
+                    lower = (given_lower if lower is None
+                             else max(lower, given_lower))
+                if given_upper is not None:
+                    upper = (given_upper if upper is None
+                             else min(upper, given_upper))
+            if lower is not None:
+                lower = nextafter(lower, inf)
+            if upper is not None:
+                upper = nextafter(upper, -inf)
+            bounds.append((lower, upper))
+        return bounds
+
+    def _profile_statistics(self, data):
+        return self._sufficient_statistics(data)
+
+    def _sufficient_statistics(self, data):
+        """
+        The statistics of data, already within xmin and xmax, through which
+        alone its log likelihood depends on the data. None if the log
+        likelihood needs all the data, as it does by default.
+
+        Distributions that return statistics also define
+        _loglikelihood_from_statistics(statistics), the sum of the log
+        likelihoods of the data with those statistics, without the floor on
+        each point's likelihood. Out of the range of valid parameters each
+        likelihood is the smallest float, as in pdf. It is only called where
+        statistics are not None.
+        """
+        return None
+
+    def _loglikelihood_gradient(self, data):
+        """
+        The gradient of the sum of the log likelihoods of data, already
+        within xmin and xmax, with respect to each of the parameters. None if
+        it isn't known, as for discrete distributions.
+        """
+        return None
+
     def KS(self, data=None):
         """
         Returns the Kolmogorov-Smirnov distance D between the distribution and
@@ -834,6 +2000,8 @@ class Distribution(object):
             C = self._pdf_continuous_normalizer
             likelihoods = f*C
         else:
+#Discrete data is often heavily tied, so each unique value is calculated once
+            data, inverse, counts = _unique_values(data)
             if self._pdf_discrete_normalizer:
                 f = self._pdf_base_function(data)
                 C = self._pdf_discrete_normalizer
@@ -866,12 +2034,12 @@ class Distribution(object):
                     upper_limit = self.xmax
                 else:
                     upper_limit = self.discrete_approximation
-#            from mpmath import exp
-                from numpy import arange
-                X = arange(self.xmin, upper_limit+1)
-                PDF = self._pdf_base_function(X)
-                PDF = (PDF/sum(PDF)).astype(float)
-                likelihoods = PDF[(data-self.xmin).astype(int)]
+#The normalizer is summed without an array over the whole range, which
+#could be very large
+                C = _discrete_sum(self._pdf_base_function, self.xmin,
+                                  upper_limit)
+                likelihoods = (self._pdf_base_function(data)/C).astype(float)
+            likelihoods = likelihoods[inverse]
         likelihoods[likelihoods==0] = 10**float_info.min_10_exp
         return likelihoods
 
@@ -1118,8 +2286,9 @@ class Distribution(object):
 
 class Power_Law(Distribution):
 
-    def __init__(self, estimate_discrete=True, **kwargs):
+    def __init__(self, estimate_discrete=True, zeta_table=False, **kwargs):
         self.estimate_discrete = estimate_discrete
+        self.zeta_table = zeta_table
         Distribution.__init__(self, **kwargs)
 
     def parameters(self, params):
@@ -1141,6 +2310,15 @@ class Power_Law(Distribution):
     def _in_standard_parameter_range(self):
         return self.alpha>1
 
+    _standard_parameter_bounds = (('alpha', 1, None),)
+
+    @property
+    def _truncated(self):
+#A continuous power law is normalized between xmin and xmax only when fitted
+#by a fit_optimizer. Otherwise it is normalized above xmin, like the other
+#distributions, so that their likelihoods can be compared.
+        return bool(self.xmax) and self.fit_optimizer is not None
+
     def fit(self, data=None):
         if data is None and hasattr(self, 'parent_Fit'):
             data = self.parent_Fit.data
@@ -1157,6 +2335,35 @@ class Power_Law(Distribution):
             if not self.in_range():
                 Distribution.fit(self, data, suppress_output=True)
             self.KS(data)
+        elif (self.discrete and self.fit_method=='Likelihood' and
+              not hasattr(self, '_range_dict') and
+              not hasattr(self, '_in_given_parameter_range')):
+#The exact fit needs only the number of data points and the sum of their logs
+            self.alpha = _discrete_power_law_alphas(
+                [self.xmin], [self.n], [sum(log(data))], self.xmax,
+                zeta_table=self.zeta_table)[0]
+            if not self.in_range():
+                Distribution.fit(self, data, suppress_output=True)
+            self.loglikelihood = sum(self.loglikelihoods(data))
+            self.KS(data)
+        elif (not self.discrete and self.fit_method=='Likelihood' and
+              not hasattr(self, '_range_dict') and
+              not hasattr(self, '_in_given_parameter_range')):
+            if self._truncated:
+#Between xmin and xmax the fit is the single root of a monotone function of
+#alpha, given the number of data points and the sum of their logs
+                alphas, sigmas = _power_law_window_alphas([log(self.xmin)],
+                                                          [log(self.xmax)],
+                                                          [sum(log(data))],
+                                                          [self.n])
+                self.alpha = alphas[0]
+            else:
+#Normalized above xmin, the fit has the same closed form as without an xmax
+                self.alpha = 1 + (self.n / sum(log(data/self.xmin)))
+            if not self.in_range():
+                Distribution.fit(self, data, suppress_output=True)
+            self.loglikelihood = sum(self.loglikelihoods(data))
+            self.KS(data)
         else:
             Distribution.fit(self, data, suppress_output=True)
 
@@ -1169,6 +2376,48 @@ class Power_Law(Distribution):
         from numpy import log, sum
         return 1 + len(data)/sum(log(data / (self.xmin)))
 
+    def cdf(self, data=None, survival=False):
+        """
+        The cumulative distribution function (CDF) of the power law.
+        Calculated for the values given in data within xmin and xmax, if
+        present. For discrete power laws the CDF is calculated from partial
+        sums of the Hurwitz zeta function, which needs one evaluation of zeta
+        for all the integer values above xmin.
+
+        Parameters
+        ----------
+        data : list or array, optional
+            If not provided, attempts to use the data from the Fit object in
+            which the Distribution object is contained.
+        survival : bool, optional
+            Whether to calculate a CDF (False) or CCDF (True).
+            False by default.
+
+        Returns
+        -------
+        X : array
+            The sorted, unique values in the data.
+        probabilities : array
+            The portion of the data that is less than or equal to X.
+        """
+        if not self.discrete:
+            return Distribution.cdf(self, data=data, survival=survival)
+        if data is None and hasattr(self, 'parent_Fit'):
+            data = self.parent_Fit.data
+        data = trim_to_range(data, xmin=self.xmin, xmax=self.xmax)
+        from sys import float_info
+        if not self.in_range():
+            from numpy import tile
+            return tile(10**float_info.min_10_exp, len(data))
+
+        from numpy import unique
+        X, inverse = unique(data, return_inverse=True)
+        CDF = _power_law_discrete_cdf([self.alpha], [self.xmin], X,
+                                      xmax=self.xmax)[0][inverse]
+        if survival:
+            CDF = 1 - CDF
+        return CDF
+
     def _cdf_base_function(self, x):
         if self.discrete:
             from scipy.special import zeta
@@ -1185,16 +2434,69 @@ class Power_Law(Distribution):
 
     @property
     def _pdf_continuous_normalizer(self):
-        return (self.alpha-1) * self.xmin**(self.alpha-1)
+        C = (self.alpha-1) * self.xmin**(self.alpha-1)
+        if self._truncated:
+#Normalized over xmin to xmax, as the CDF is
+            C /= 1 - (self.xmax/self.xmin)**(1-self.alpha)
+        return C
 
     @property
     def _pdf_discrete_normalizer(self):
-        C = 1.0 - self._cdf_xmin
         if self.xmax:
-            C -= 1 - self._cdf_base_function(self.xmax+1)
+            C = _zeta_partial_sums([self.alpha], [self.xmin],
+                                   [self.xmax+1])[0][0,0]
+        else:
+            from scipy.special import zeta
+            C = zeta(self.alpha, self.xmin)
         C = 1.0/C
         return C
 
+    def _sufficient_statistics(self, data):
+        from numpy import log, sum
+        return len(data), sum(log(data))
+
+    def _loglikelihood_from_statistics(self, statistics):
+        from numpy import log, log1p
+        from sys import float_info
+        n, log_sum = statistics
+        if not self.in_range():
+            return n*log(10**float_info.min_10_exp)
+        if self.discrete:
+            logC = log(self._pdf_discrete_normalizer)
+        else:
+            logC = log(self.alpha-1) + (self.alpha-1)*log(self.xmin)
+            if self._truncated:
+                logC -= log1p(-(self.xmax/self.xmin)**(1-self.alpha))
+        return n*logC - self.alpha*log_sum
+
+    def _batch_loglikelihoods(self, parameters, statistics):
+        if self.discrete:
+            return Distribution._batch_loglikelihoods(self, parameters,
+                                                      statistics)
+        from numpy import log, log1p, full
+        from sys import float_info
+        n, log_sum = statistics
+        in_range = self._batch_in_range(parameters)
+        loglikelihoods = full(len(parameters),
+                              n*log(10**float_info.min_10_exp))
+        alpha = parameters[in_range, 0]
+        logC = log(alpha-1) + (alpha-1)*log(self.xmin)
+        if self._truncated:
+            logC -= log1p(-(self.xmax/self.xmin)**(1-alpha))
+        loglikelihoods[in_range] = n*logC - alpha*log_sum
+        return loglikelihoods
+
+    def _loglikelihood_gradient(self, data):
+        if self.discrete:
+            return None
+        from numpy import log, sum, expm1, asarray
+        n = len(data)
+        d_alpha = n/(self.alpha-1) - sum(log(data/self.xmin))
+        if self._truncated:
+            log_ratio = log(self.xmax/self.xmin)
+            d_alpha -= n*log_ratio/expm1((self.alpha-1)*log_ratio)
+        return asarray([d_alpha])
+
     def _generate_random_continuous(self, r):
             return self.xmin * (1 - r) ** (-1/(self.alpha - 1))
     def _generate_random_discrete_estimate(self, r):
@@ -1220,6 +2522,28 @@ class Exponential(Distribution):
     def _in_standard_parameter_range(self):
         return self.Lambda>0
 
+    _standard_parameter_bounds = (('Lambda', 0, None),)
+
+    def fit(self, data=None, suppress_output=False):
+        if data is None and hasattr(self, 'parent_Fit'):
+            data = self.parent_Fit.data
+        data = trim_to_range(data, xmin=self.xmin, xmax=self.xmax)
+        from numpy import mean, log1p, sum
+        excess = mean(data) - self.xmin
+#Without an xmax, the maximum likelihood fit has a closed form
+        if (self.fit_method!='Likelihood' or not excess>0 or self.xmax or
+                hasattr(self, '_range_dict') or
+                hasattr(self, '_in_given_parameter_range')):
+            Distribution.fit(self, data, suppress_output=suppress_output)
+            return
+        if self.discrete:
+            self.parameters([log1p(1/excess)])
+        else:
+            self.parameters([1/excess])
+        self.noise_flag = False
+        self.loglikelihood = sum(self.loglikelihoods(data))
+        self.KS(data)
+
     def _cdf_base_function(self, x):
         from numpy import exp
         CDF = 1 - exp(-self.Lambda*x)
@@ -1276,6 +2600,44 @@ class Exponential(Distribution):
             loglikelihoods = Distribution.loglikelihoods(self, data)
         return loglikelihoods
 
+    def _sufficient_statistics(self, data):
+        from numpy import sum
+        return len(data), sum(data)
+
+    def _loglikelihood_from_statistics(self, statistics):
+        from numpy import log, log1p, exp
+        from sys import float_info
+        n, total = statistics
+        if not self.in_range():
+            return n*log(10**float_info.min_10_exp)
+        logC = log(self.Lambda) + self.Lambda*self.xmin
+        if self.discrete:
+            logC = log1p(-exp(-self.Lambda)) + self.Lambda*self.xmin
+            if self.xmax:
+                logC -= log1p(-exp(-self.Lambda*(self.xmax-self.xmin)))
+        return n*logC - self.Lambda*total
+
+    def _batch_loglikelihoods(self, parameters, statistics):
+        if self.discrete:
+            return Distribution._batch_loglikelihoods(self, parameters,
+                                                      statistics)
+        from numpy import log, full
+        from sys import float_info
+        n, total = statistics
+        in_range = self._batch_in_range(parameters)
+        loglikelihoods = full(len(parameters),
+                              n*log(10**float_info.min_10_exp))
+        Lambda = parameters[in_range, 0]
+        loglikelihoods[in_range] = (n*(log(Lambda) + Lambda*self.xmin) -
+                                    Lambda*total)
+        return loglikelihoods
+
+    def _loglikelihood_gradient(self, data):
+        if self.discrete:
+            return None
+        from numpy import sum, asarray
+        return asarray([len(data)/self.Lambda + sum(self.xmin-data)])
+
     def _generate_random_continuous(self, r):
         from numpy import log
         return self.xmin - (1/self.Lambda) * log(1-r)
@@ -1301,6 +2663,54 @@ class Stretched_Exponential(Distribution):
     def _in_standard_parameter_range(self):
         return self.Lambda>0 and self.beta>0
 
+    _standard_parameter_bounds = (('Lambda', 0, None), ('beta', 0, None))
+
+    profile_parameter = 'beta'
+
+    def _profile_statistics(self, data):
+        from numpy import log, sum
+        log_ratios = log(data/self.xmin)
+        return len(data), log_ratios, sum(log(data))
+
+    def _profile(self, beta, statistics):
+#Given beta, the likelihood is greatest at Lambda**beta = n/S, with
+#S = sum(x**beta - xmin**beta)
+        from numpy import log, sum, exp, expm1, inf
+        from sys import float_info
+        n, log_ratios, log_sum = statistics
+        log_S = beta*log(self.xmin) + log(sum(expm1(beta*log_ratios)))
+#As beta goes to 0, Lambda grows past the largest float
+        log_Lambda = (log(n) - log_S)/beta
+        Lambda = exp(log_Lambda) if log_Lambda < log(float_info.max) else inf
+        loglikelihood = (n*log(beta) + n*log(n) - n*log_S - n +
+                         (beta-1)*log_sum)
+        return loglikelihood, (Lambda, beta)
+
+    def _batch_statistics(self, data):
+        if self.discrete or self.xmax:
+            return None
+        return self._profile_statistics(data)
+
+    def _batch_loglikelihoods(self, parameters, statistics, memory=2**23):
+#sum((Lambda*x)**beta - (Lambda*xmin)**beta) is
+#(Lambda*xmin)**beta * sum(expm1(beta*log(x/xmin))), which is summed for
+#blocks of rows at once, of about memory bytes
+        from numpy import log, expm1, full, outer, concatenate
+        from sys import float_info
+        n, log_ratios, log_sum = statistics
+        in_range = self._batch_in_range(parameters)
+        loglikelihoods = full(len(parameters),
+                              n*log(10**float_info.min_10_exp))
+        Lambda = parameters[in_range, 0]
+        beta = parameters[in_range, 1]
+        block = max(1, memory//(8*max(len(log_ratios), 1)))
+        sums = concatenate([expm1(outer(beta[i:i+block], log_ratios)).sum(axis=1)
+                            for i in range(0, len(beta), block)] + [[]])
+        loglikelihoods[in_range] = (n*log(beta) + n*beta*log(Lambda) +
+                                    (beta-1)*log_sum -
+                                    (Lambda*self.xmin)**beta*sums)
+        return loglikelihoods
+
     def _cdf_base_function(self, x):
         from numpy import exp
         CDF = 1 - exp(-(self.Lambda*x)**self.beta)
@@ -1357,6 +2767,20 @@ class Stretched_Exponential(Distribution):
             loglikelihoods = Distribution.loglikelihoods(self, data)
         return loglikelihoods
 
+    def _loglikelihood_gradient(self, data):
+        if self.discrete:
+            return None
+        from numpy import log, sum, asarray
+        n = len(data)
+        log_scaled = log(self.Lambda*data)
+        log_scaled_xmin = log(self.Lambda*self.xmin)
+        powers = (self.Lambda*data)**self.beta
+        power_xmin = (self.Lambda*self.xmin)**self.beta
+        d_Lambda = self.beta/self.Lambda * (n + n*power_xmin - sum(powers))
+        d_beta = (n/self.beta + sum(log_scaled) +
+                  n*power_xmin*log_scaled_xmin - sum(powers*log_scaled))
+        return asarray([d_Lambda, d_beta])
+
     def _generate_random_continuous(self, r):
         from numpy import log
 #        return ( (self.xmin**self.beta) -
@@ -1387,14 +2811,72 @@ class Truncated_Power_Law(Distribution):
     def _in_standard_parameter_range(self):
         return self.Lambda>0 and self.alpha>1
 
-    def _cdf_base_function(self, x):
-        from mpmath import gammainc
-        from numpy import vectorize
-        gammainc = vectorize(gammainc)
+    _standard_parameter_bounds = (('alpha', 1, None), ('Lambda', 0, None))
 
-        CDF = ( (gammainc(1-self.alpha,self.Lambda*x)).astype('float') /
-                self.Lambda**(1-self.alpha)
-                    )
+    profile_parameter = 'alpha'
+
+    def _sufficient_statistics(self, data):
+        from numpy import log, sum
+        return len(data), sum(log(data)), sum(data)
+
+    def _loglikelihood_from_statistics(self, statistics):
+        from numpy import log
+        from sys import float_info
+        n, log_sum, total = statistics
+        if not self.in_range():
+            return n*log(10**float_info.min_10_exp)
+        if self.discrete:
+            logC = log(self._pdf_discrete_normalizer)
+        else:
+            logC = ((1-self.alpha)*log(self.Lambda) -
+                    _log_upper_gamma(1-self.alpha, self.Lambda*self.xmin))
+        return n*logC - self.alpha*log_sum - self.Lambda*total
+
+    def _profile(self, alpha, statistics):
+#Given alpha, the likelihood is greatest where the distribution's mean,
+#gammainc(2-alpha, z)/(Lambda*gammainc(1-alpha, z)) with z = Lambda*xmin,
+#matches the data's mean. The mean falls as Lambda rises, and is below
+#xmin + 1/Lambda. As Lambda goes to 0 it rises to the mean of the power law,
+#which is finite for alpha > 2. If that is below the data's mean, the
+#likelihood is greatest in the limit of a power law.
+        from numpy import log, exp, nan, isfinite
+        from scipy.optimize import brentq
+        n, log_sum, total = statistics
+        mean = total/n
+        s = 1 - alpha
+        if alpha > 2 and mean >= self.xmin*(alpha-1)/(alpha-2):
+            return (n*log(alpha-1) + n*(alpha-1)*log(self.xmin) -
+                    alpha*log_sum), (alpha, 0)
+
+        def log_mean_ratio(log_Lambda):
+            z = exp(log_Lambda)*self.xmin
+            log_ratio = (_log_upper_gamma(s+1, z) - _log_upper_gamma(s, z) -
+                         log_Lambda)
+            if not isfinite(log_ratio):
+                raise ValueError("Incomplete gamma function out of range")
+            return log_ratio - log(mean)
+
+        upper = -log(mean - self.xmin)
+        lower = upper - 1
+        try:
+            while log_mean_ratio(lower) <= 0:
+                lower -= 2*(upper - lower)
+#Beyond this the fit is indistinguishable from a power law
+                if lower < -700:
+                    return nan, (alpha, 0)
+            Lambda = exp(brentq(log_mean_ratio, lower, upper, xtol=1e-12))
+        except ValueError:
+#The incomplete gamma function can't be calculated for such extreme values
+            return nan, (alpha, nan)
+        loglikelihood = (n*((1-alpha)*log(Lambda) -
+                            _log_upper_gamma(s, Lambda*self.xmin)) -
+                         alpha*log_sum - Lambda*total)
+        return loglikelihood, (alpha, Lambda)
+
+    def _cdf_base_function(self, x):
+        from numpy import exp, log
+        CDF = exp(_log_upper_gamma(1-self.alpha, self.Lambda*x) -
+                  (1-self.alpha)*log(self.Lambda))
         CDF = 1 -CDF
         return CDF
 
@@ -1404,25 +2886,18 @@ class Truncated_Power_Law(Distribution):
 
     @property
     def _pdf_continuous_normalizer(self):
-        from mpmath import gammainc
-        C = ( self.Lambda**(1-self.alpha) /
-                float(gammainc(1-self.alpha,self.Lambda*self.xmin)))
+        from numpy import exp, log
+        C = exp((1-self.alpha)*log(self.Lambda) -
+                _log_upper_gamma(1-self.alpha, self.Lambda*self.xmin))
         return C
 
     @property
     def _pdf_discrete_normalizer(self):
         if 0:
             return False
-        from mpmath import lerchphi
-        from mpmath import exp # faster /here/ than numpy.exp
-        C = ( float(exp(self.xmin * self.Lambda) /
-            lerchphi(exp(-self.Lambda), self.alpha, self.xmin)) )
-        if self.xmax:
-            Cxmax = ( float(exp(self.xmax * self.Lambda) /
-                lerchphi(exp(-self.Lambda), self.alpha, self.xmax)) )
-            C = 1.0/C - 1.0/Cxmax
-            C = 1.0/C
-        return C
+        return _discrete_truncated_power_law_normalizer(
+            float(self.alpha), float(self.Lambda), float(self.xmin),
+            float(self.xmax) if self.xmax else None)
 
     def pdf(self, data=None):
         if data is None and hasattr(self, 'parent_Fit'):
@@ -1447,6 +2922,43 @@ class Truncated_Power_Law(Distribution):
             likelihoods = Distribution.pdf(self, data)
         return likelihoods
 
+    def loglikelihoods(self, data=None):
+        if data is None and hasattr(self, 'parent_Fit'):
+            data = self.parent_Fit.data
+        if not self.discrete and self.in_range() and not self.xmax:
+            data = trim_to_range(data, xmin=self.xmin, xmax=self.xmax)
+            from numpy import log
+            from sys import float_info
+#The logarithm of the normalizer is taken in log space, where the incomplete
+#gamma function can't underflow. For extreme parameters it can't be
+#calculated, and the likelihood is nan.
+            logC = ((1-self.alpha)*log(self.Lambda) -
+                    _log_upper_gamma(1-self.alpha, self.Lambda*self.xmin))
+            loglikelihoods = logC - self.alpha*log(data) - self.Lambda*data
+#As in pdf, likelihoods too small to represent are floored
+            floor = log(10**float_info.min_10_exp)
+            loglikelihoods[loglikelihoods<floor] = floor
+        else:
+            loglikelihoods = Distribution.loglikelihoods(self, data)
+        return loglikelihoods
+
+    def _loglikelihood_gradient(self, data):
+        if self.discrete:
+            return None
+        from numpy import log, sum, asarray
+        n = len(data)
+        s = 1-self.alpha
+        z = self.Lambda*self.xmin
+#The derivative of the log of the normalizer's incomplete gamma function, G.
+#As s = 1-alpha, the derivative by alpha is minus that by s.
+        dlogG_ds, ratio = _upper_gamma_log_derivatives(s, z)
+        d_alpha = -n*log(self.Lambda) - sum(log(data)) + n*dlogG_ds
+#The derivative by Lambda is n/Lambda * (s + z**s * exp(-z)/G). Its two terms
+#cancel as Lambda goes to 0, but by the recurrence of the incomplete gamma
+#function their sum is Gamma(s+1, z)/G, which is z times ratio.
+        d_Lambda = n*self.xmin*ratio - sum(data)
+        return asarray([d_alpha, d_Lambda])
+
     def _generate_random_continuous(self, r):
         def helper(r):
             from numpy import log
@@ -1501,13 +3013,15 @@ class Lognormal(Distribution):
             return tile(10**float_info.min_10_exp, n)
 
         if not self.discrete:
-            f = self._pdf_base_function(data)
-            C = self._pdf_continuous_normalizer
-            if C > 0:
-                likelihoods = f/C
-            else:
-                likelihoods = tile(10**float_info.min_10_exp, n)
+#f/C, in log space so that neither underflows
+            from numpy import log, exp
+            logdata = log(data)
+            likelihoods = exp(-logdata - (logdata - self.mu)**2 /
+                              (2*self.sigma**2) -
+                              self._log_pdf_continuous_normalizer)
         else:
+#As in Distribution.pdf
+            data, inverse, counts = _unique_values(data)
             if self._pdf_discrete_normalizer:
                 f = self._pdf_base_function(data)
                 C = self._pdf_discrete_normalizer
@@ -1519,15 +3033,50 @@ class Lognormal(Distribution):
                     upper_limit = self.xmax
                 else:
                     upper_limit = self.discrete_approximation
-#            from mpmath import exp
-                from numpy import arange
-                X = arange(self.xmin, upper_limit+1)
-                PDF = self._pdf_base_function(X)
-                PDF = (PDF/sum(PDF)).astype(float)
-                likelihoods = PDF[(data-self.xmin).astype(int)]
+#The normalizer is summed without an array over the whole range, which
+#could be very large
+                C = _discrete_sum(self._pdf_base_function, self.xmin,
+                                  upper_limit)
+                likelihoods = (self._pdf_base_function(data)/C).astype(float)
+            likelihoods = likelihoods[inverse]
         likelihoods[likelihoods==0] = 10**float_info.min_10_exp
         return likelihoods
 
+    def loglikelihoods(self, data=None):
+        if data is None and hasattr(self, 'parent_Fit'):
+            data = self.parent_Fit.data
+        if not self.discrete and self.in_range():
+            data = trim_to_range(data, xmin=self.xmin, xmax=self.xmax)
+            from numpy import log
+            from sys import float_info
+            floor = log(10**float_info.min_10_exp)
+            logC = self._log_pdf_continuous_normalizer
+            logdata = log(data)
+            loglikelihoods = (-logdata - logC -
+                              (logdata - self.mu)**2 / (2*self.sigma**2))
+#As in pdf, likelihoods too small to represent are floored
+            loglikelihoods[loglikelihoods<floor] = floor
+        else:
+            loglikelihoods = Distribution.loglikelihoods(self, data)
+        return loglikelihoods
+
+    def _loglikelihood_gradient(self, data):
+        if self.discrete:
+            return None
+        from numpy import log, sum, exp, asarray
+        from scipy.constants import pi
+        from scipy.special import log_ndtr
+        n = len(data)
+        z_xmin = (log(self.xmin) - self.mu)/self.sigma
+#The hazard of the standard normal at z_xmin, from the derivative of the
+#normalizer's log_ndtr
+        hazard = exp(-z_xmin**2/2 - .5*log(2*pi) - log_ndtr(-z_xmin))
+        deviations = log(data) - self.mu
+        d_mu = -n*hazard/self.sigma + sum(deviations)/self.sigma**2
+        d_sigma = (-n*(hazard*z_xmin + 1)/self.sigma +
+                   sum(deviations**2)/self.sigma**3)
+        return asarray([d_mu, d_sigma])
+
     def _round_discrete_approx(self, data):
         """
         This function reformulates the calculation to avoid underflow errors
@@ -1592,8 +3141,8 @@ class Lognormal(Distribution):
         probabilities : array
             The portion of the data that is less than or equal to X.
         """
-        from numpy import log, sqrt
-        import scipy.special as ss
+        from numpy import log, exp, expm1
+        from scipy.special import log_ndtr
         if data is None and hasattr(self, 'parent_Fit'):
             data = self.parent_Fit.data
         data = trim_to_range(data, xmin=self.xmin, xmax=self.xmax)
@@ -1603,19 +3152,27 @@ class Lognormal(Distribution):
             from numpy import tile
             return tile(10**float_info.min_10_exp, n)
 
-        val_data = (log(data)-self.mu) / (sqrt(2)*self.sigma)
-        val_xmin = (log(self.xmin)-self.mu) / (sqrt(2)*self.sigma)
-        CDF = 0.5 * (ss.erfc(val_xmin) - ss.erfc(val_data))
-
-        norm = 0.5 * ss.erfc(val_xmin)
-        if self.xmax:
-            # TO DO: Improve this line further for better numerical accuracy?
-            norm = norm - (1 - self._cdf_base_function(self.xmax))
-
-        CDF = CDF/norm
-
-        if survival:
-            CDF = 1 - CDF
+#The log of the survival function of each value, relative to that of xmin,
+#from log_ndtr of the upper tail. expm1 keeps the CDF's precision close to
+#xmin, and the survival function's far above it.
+        log_survival_xmin = log_ndtr(-(log(self.xmin) - self.mu)/self.sigma)
+        log_survival = (log_ndtr(-(log(data) - self.mu)/self.sigma) -
+                        log_survival_xmin)
+        if not self.xmax:
+            if survival:
+                CDF = exp(log_survival)
+            else:
+                CDF = -expm1(log_survival)
+        else:
+            log_survival_xmax = (
+                log_ndtr(-(log(self.xmax) - self.mu)/self.sigma) -
+                log_survival_xmin)
+            norm = -expm1(log_survival_xmax)
+            if survival:
+                CDF = (exp(log_survival) *
+                       -expm1(log_survival_xmax - log_survival) / norm)
+            else:
+                CDF = -expm1(log_survival) / norm
 
         possible_numerical_error = False
         from numpy import isnan, min
@@ -1638,6 +3195,73 @@ class Lognormal(Distribution):
 #The standard deviation can't be negative
         return self.sigma>0
 
+    _standard_parameter_bounds = (('mu', None, None), ('sigma', 0, None))
+
+    profile_parameter = 'sigma'
+
+    def _sufficient_statistics(self, data):
+        if self.discrete:
+            return None
+        from numpy import log, mean, sum
+        logdata = log(data)
+        log_mean = mean(logdata)
+        return len(data), log_mean, sum((logdata - log_mean)**2)
+
+    def _loglikelihood_from_statistics(self, statistics):
+        from numpy import log
+        from sys import float_info
+        n, log_mean, sum_squares = statistics
+        if not self.in_range():
+            return n*log(10**float_info.min_10_exp)
+        logC = self._log_pdf_continuous_normalizer
+        return (-n*log_mean - n*logC -
+                (sum_squares + n*(log_mean - self.mu)**2)/(2*self.sigma**2))
+
+    def _batch_loglikelihoods(self, parameters, statistics):
+        from numpy import log, full
+        from scipy.constants import pi
+        from scipy.special import log_ndtr
+        from sys import float_info
+        n, log_mean, sum_squares = statistics
+        in_range = self._batch_in_range(parameters)
+        loglikelihoods = full(len(parameters),
+                              n*log(10**float_info.min_10_exp))
+        mu = parameters[in_range, 0]
+        sigma = parameters[in_range, 1]
+        logC = (log(2) + log_ndtr(-(log(self.xmin) - mu)/sigma) -
+                .5*log(2/(pi*sigma**2)))
+        loglikelihoods[in_range] = (-n*log_mean - n*logC -
+                                    (sum_squares + n*(log_mean - mu)**2) /
+                                    (2*sigma**2))
+        return loglikelihoods
+
+    def _profile(self, sigma, statistics):
+#Given sigma, the likelihood is greatest where t = (log(xmin) - mu)/sigma
+#solves h(t) - t = D/sigma, with h the hazard of the standard normal and D the
+#mean of log(x/xmin). h(t) - t falls from infinity to 0, and is below 1/t for
+#positive t, which brackets the root.
+        from numpy import log, exp, nan
+        from scipy.constants import pi
+        from scipy.special import log_ndtr
+        from scipy.optimize import brentq
+        n, log_mean, sum_squares = statistics
+        D = log_mean - log(self.xmin)
+
+        def excess_hazard(t):
+            return (exp(-t**2/2 - .5*log(2*pi) - log_ndtr(-t)) - t -
+                    D/sigma)
+
+        try:
+            t = brentq(excess_hazard, -D/sigma, 2*sigma/D, xtol=1e-14)
+        except ValueError:
+#Rounding in h(t) - t for extreme t
+            return nan, (nan, sigma)
+        mu = log(self.xmin) - t*sigma
+        logC = log(2) + log_ndtr(-t) - .5*log(2/(pi*sigma**2))
+        loglikelihood = (-n*log_mean - n*logC -
+                         (sum_squares + n*(log_mean - mu)**2)/(2*sigma**2))
+        return loglikelihood, (mu, sigma)
+
     def _cdf_base_function(self, x):
         from numpy import sqrt, log
         from scipy.special import erf
@@ -1651,31 +3275,32 @@ class Lognormal(Distribution):
 
     @property
     def _pdf_continuous_normalizer(self):
-        from mpmath import erfc
-#        from scipy.special import erfc
+        from numpy import exp
+        return exp(self._log_pdf_continuous_normalizer)
+
+    @property
+    def _log_pdf_continuous_normalizer(self):
+#The logarithm of the normalizer, with erfc(z/sqrt(2)) = 2*ndtr(-z), which
+#can't underflow
+        from numpy import log
         from scipy.constants import pi
-        from numpy import sqrt, log
-        C = (erfc((log(self.xmin) - self.mu) / (sqrt(2) * self.sigma)) /
-             sqrt(2/(pi*self.sigma**2)))
-        return float(C)
+        from scipy.special import log_ndtr
+        return (log(2) + log_ndtr(-(log(self.xmin) - self.mu)/self.sigma) -
+                .5*log(2/(pi*self.sigma**2)))
 
     @property
     def _pdf_discrete_normalizer(self):
         return False
 
     def _generate_random_continuous(self, r):
-        from numpy import exp, sqrt, log, frompyfunc
-        from mpmath import erf, erfinv
-        #This is a long, complicated function broken into parts.
-        #We use mpmath to maintain numerical accuracy as we run through
-        #erf and erfinv, until we get to more sane numbers. Thanks to
-        #Wolfram Alpha for producing the appropriate inverse of the CCDF
-        #for me, which is what we need to calculate these things.
-        erfinv = frompyfunc(erfinv,1,1)
-        Q = erf( ( log(self.xmin) - self.mu ) / (sqrt(2)*self.sigma))
-        Q = Q*r - r + 1.0
-        Q = erfinv(Q).astype('float')
-        return exp(self.mu + sqrt(2)*self.sigma*Q)
+        from numpy import exp, log
+        from scipy.special import log_ndtr, ndtri_exp
+#Inverting the CCDF: the standardized log of x, z, has
+#ndtr(-z) = r*ndtr(-t), with t that of xmin. This is solved in log space, with
+#the inverse of log_ndtr, so the tail far above xmin doesn't underflow.
+        t = (log(self.xmin) - self.mu)/self.sigma
+        z = -ndtri_exp(log(r) + log_ndtr(-t))
+        return exp(self.mu + self.sigma*z)
 
 #    def _generate_random_continuous(self, r1, r2=None):
 #        from numpy import log, sqrt, exp, sin, cos
@@ -1707,6 +3332,8 @@ class Lognormal_Positive(Lognormal):
 #The standard deviation and mean can't be negative
         return (self.sigma>0 and self.mu>0)
 
+    _standard_parameter_bounds = (('mu', 0, None), ('sigma', 0, None))
+
 def nested_loglikelihood_ratio(loglikelihoods1, loglikelihoods2, **kwargs):
     """
     Calculates a loglikelihood ratio and the p-value for testing which of two
@@ -1746,7 +3373,7 @@ def nested_loglikelihood_ratio(loglikelihoods1, loglikelihoods2, **kwargs):
             nested=True, **kwargs)
 
 def loglikelihood_ratio(loglikelihoods1, loglikelihoods2,
-        nested=False, normalized_ratio=False):
+        nested=False, normalized_ratio=False, counts=None):
     """
     Calculates a loglikelihood ratio and the p-value for testing which of two
     probability distributions is more likely to have created a set of
@@ -1766,6 +3393,10 @@ def loglikelihood_ratio(loglikelihoods1, loglikelihoods2,
     normalized_ratio : bool, optional
         Whether to return the loglikelihood ratio, R, or the normalized
         ratio R/sqrt(n*variance)
+    counts : list or array, optional
+        The number of observations with each of the likelihoods, when each
+        is of a unique value of the data. By default each likelihood is of
+        one observation.
 
     Returns
     -------
@@ -1780,16 +3411,18 @@ def loglikelihood_ratio(loglikelihoods1, loglikelihoods2,
         critical value the sign of R is taken to be due to statistical
         fluctuations.
     """
-    from numpy import sqrt
+    from numpy import sqrt, asarray, ones, sum
     from scipy.special import erfc
 
-    n = float(len(loglikelihoods1))
+    if counts is None:
+        counts = ones(len(loglikelihoods1))
+    counts = asarray(counts, dtype='float')
+    n = counts.sum()
 
     if n==0:
         R = 0
         p = 1
         return R, p
-    from numpy import asarray
     loglikelihoods1 = asarray(loglikelihoods1)
     loglikelihoods2 = asarray(loglikelihoods2)
 
@@ -1800,11 +3433,10 @@ def loglikelihood_ratio(loglikelihoods1, loglikelihoods2,
     loglikelihoods1[loglikelihoods1==-inf] = min_val
     loglikelihoods2[loglikelihoods2==-inf] = min_val
 
-    R = sum(loglikelihoods1-loglikelihoods2)
+    R = sum(counts*(loglikelihoods1-loglikelihoods2))
 
-    from numpy import mean
-    mean_diff = mean(loglikelihoods1)-mean(loglikelihoods2)
-    variance = sum(
+    mean_diff = R/n
+    variance = sum(counts *
             ( (loglikelihoods1-loglikelihoods2) - mean_diff)**2
             )/n
 
@@ -2128,6 +3760,1457 @@ def bisect_map(mn, mx, function, target):
         else:
             return m
 
+def _power_law_alpha_scan(data, xmin_indices, discrete=False,
+                          estimate_discrete=True, xmax=None,
+                          zeta_table=False):
+    """
+    Calculates the maximum likelihood fit of a power law for many candidate
+    xmins at once, using reverse cumulative sums of log(data). For discrete
+    data this is the estimate used with estimate_discrete, or the exact fit
+    from _discrete_power_law_alphas.
+
+    Parameters
+    ----------
+    data : array
+        The data, sorted in increasing order, and within xmax.
+    xmin_indices : array of ints
+        The index of the first occurrence of each candidate xmin in data.
+    discrete : bool, optional
+        Whether the data is discrete (integers).
+    estimate_discrete : bool, optional
+        Whether to estimate discrete fits from the continuous approximation
+        rather than fitting them exactly. Only used without an xmax.
+    xmax : float, optional
+        The xmax of discrete fits.
+    zeta_table : bool, optional
+        Whether exact discrete fits interpolate the Hurwitz zeta function
+        from tables.
+
+    Returns
+    -------
+    alphas : array
+        The fitted power law exponent for each candidate xmin.
+    sigmas : array
+        The standard error of each alpha.
+    n_tails : array
+        The number of data points at or above each candidate xmin.
+    """
+    from numpy import log, cumsum, sqrt, asarray
+    xmin_indices = asarray(xmin_indices)
+    n_tails = len(data) - xmin_indices
+    tail_log_sums = cumsum(log(data)[::-1])[::-1][xmin_indices]
+    xmins = data[xmin_indices]
+    if discrete and (xmax or not estimate_discrete):
+        alphas = _discrete_power_law_alphas(xmins, n_tails, tail_log_sums,
+                                            xmax, zeta_table=zeta_table)
+    else:
+        if discrete:
+            xmins = xmins - .5
+        alphas = 1 + n_tails / (tail_log_sums - n_tails*log(xmins))
+    sigmas = (alphas - 1) / sqrt(n_tails)
+    return alphas, sigmas, n_tails
+
+def _discrete_power_law_alphas(xmins, n, log_sums, xmax=None,
+                               zeta_table=False):
+    """
+    The maximum likelihood exponents of discrete power laws, fitted to many
+    tails at once from their sufficient statistics: the number of data
+    points in each tail and the sum of their logs.
+
+    The negative log likelihood per data point,
+    alpha*log_sums/n + log(zeta(alpha, xmin) - zeta(alpha, xmax+1)), is
+    convex in alpha, as the log of a sum of exponentials of alpha. Its
+    minimum is found by a golden section search over alpha above 1, whose
+    upper end starts at twice the estimate of estimate_discrete and is
+    widened until it holds the minimum. Each step takes one evaluation of
+    the Hurwitz zeta function per tail, whatever the size of the tail. With
+    zeta_table, it is interpolated from the tables of _zeta_tables.
+
+    Parameters
+    ----------
+    xmins : array
+    n : array
+        The number of data points in each tail.
+    log_sums : array
+        The sum of log(data) over each tail.
+    xmax : float, optional
+    zeta_table : bool, optional
+
+    Returns
+    -------
+    alphas : array
+    """
+    from numpy import asarray, log, sqrt, where, ones_like, expm1
+    from scipy.special import zeta
+    xmins = asarray(xmins, dtype='float')
+    n = asarray(n, dtype='float')
+    log_sums = asarray(log_sums, dtype='float')
+    mean_logs = log_sums / n
+
+    if zeta_table:
+        table_rows = _zeta_tables.table_rows(xmins)
+        if xmax:
+            xmax_row = _zeta_tables.table_rows([xmax+1])[0]
+
+        def objective(alphas, rows):
+            log_norms = _zeta_tables.log_zeta(alphas, xmins[rows],
+                                              table_rows[rows])
+            if xmax:
+                log_norms = log_norms + log(-expm1(
+                    _zeta_tables.log_zeta(alphas, xmax+1, xmax_row) -
+                    log_norms))
+            return alphas*mean_logs[rows] + log_norms
+    else:
+        def objective(alphas, rows):
+            norms = zeta(alphas, xmins[rows])
+            if xmax:
+                norms = norms - zeta(alphas, xmax+1)
+            return alphas*mean_logs[rows] + log(norms)
+
+    golden = (sqrt(5) - 1) / 2
+    alphas = ones_like(xmins)
+    lower = ones_like(xmins)
+    upper = 2 * (1 + n / (log_sums - n*log(xmins - .5)))
+    rows = (alphas==alphas).nonzero()[0]
+    while len(rows):
+        a, b = lower[rows], upper[rows]
+        c = b - golden*(b - a)
+        d = a + golden*(b - a)
+        f_c, f_d = objective(c, rows), objective(d, rows)
+        for i in range(80):
+#The minimum is between a and d if f(c) < f(d), and between c and b
+#otherwise. The point kept is the new c or d, and the other is evaluated.
+            left = f_c < f_d
+            b = where(left, d, b)
+            a = where(left, a, c)
+            kept, f_kept = where(left, c, d), where(left, f_c, f_d)
+            new = where(left, b - golden*(b - a), a + golden*(b - a))
+            f_new = objective(new, rows)
+            c, f_c = where(left, new, kept), where(left, f_new, f_kept)
+            d, f_d = where(left, kept, new), where(left, f_kept, f_new)
+        alphas[rows] = .5*(a + b)
+#Tails whose minimum is at the upper end of the bracket are searched again
+#over a wider one
+        at_upper = upper[rows] - alphas[rows] < 1e-6*(upper[rows] - 1)
+        lower[rows] = where(at_upper, upper[rows] - 1e-6*(upper[rows] - 1),
+                            lower[rows])
+        upper[rows] = where(at_upper, 2*upper[rows], upper[rows])
+        rows = rows[at_upper]
+    return alphas
+
+def _power_law_window_alphas(log_xmins, log_xmaxs, log_sums, n):
+    """
+    Calculates the maximum likelihood fits of continuous power laws
+    truncated to windows between many xmins and xmaxs at once, each from
+    the number of data points in its window and the sum of their logs.
+
+    With beta = alpha - 1, u = log(xmax/xmin) and m the mean of log(x/xmin)
+    over the window, the likelihood is maximized where
+    1/t - 1/(exp(t) - 1) = m/u, with t = beta*u. The left side falls from 1
+    to 0 as t rises, so the root is found by bisection for all windows
+    together. It is symmetric, 1 - phi(t) = phi(-t), so the root is only
+    searched for among positive t, where it lies below u/m.
+
+    Parameters
+    ----------
+    log_xmins, log_xmaxs : arrays
+        The logs of each window's xmin and xmax.
+    log_sums : array
+        The sum of log(data) over each window.
+    n : array
+        The number of data points in each window.
+
+    Returns
+    -------
+    alphas : array
+        The fitted power law exponent for each window.
+    sigmas : array
+        The standard error of each alpha, from the Fisher information.
+    """
+    from numpy import asarray, where, zeros_like, expm1, exp, sqrt, abs
+    log_xmins = asarray(log_xmins, dtype='float')
+    u = asarray(log_xmaxs, dtype='float') - log_xmins
+    n = asarray(n, dtype='float')
+    q = (asarray(log_sums, dtype='float')/n - log_xmins) / u
+    flipped = q > .5
+    q = where(flipped, 1 - q, q)
+
+    def phi(t):
+#Close to 0 the two terms cancel, and the series is used instead
+        small = t < 1e-4
+        t_safe = where(small, 1, t)
+        return where(small, .5 - t/12, 1/t_safe - 1/expm1(t_safe))
+
+    lower = zeros_like(q)
+    upper = 1 / q
+    for i in range(64):
+        t = .5*(lower + upper)
+        above = phi(t) > q
+        lower = where(above, t, lower)
+        upper = where(above, upper, t)
+    t = .5*(lower + upper)
+    t = where(flipped, -t, t)
+    betas = t / u
+
+#The Fisher information per data point, 1/beta**2 - u**2 * w/(1-w)**2 with
+#w = exp(-|t|), and its series close to t = 0
+    w = exp(-abs(t))
+    small = abs(t) < 1e-3
+    information = where(small, u**2 * (1/12 - t**2/240),
+                        1/where(small, 1, betas)**2 - u**2 * w/(1 - w)**2)
+    sigmas = 1 / sqrt(n * information)
+    return 1 + betas, sigmas
+
+def _power_law_window_scan(data, log_sums, bins, Actual_CDF, xmins, xmaxs,
+                           parameter_range=None, sigma_threshold=None,
+                           min_points=10, distance='D', memory=2**23):
+    """
+    Fits continuous power laws truncated to the windows between each
+    candidate xmin and each candidate xmax, and calculates the distance
+    between each fit and the data in its window.
+
+    The fits take constant time for each window, from the cumulative sums
+    of log(data) in log_sums. Windows with fewer than min_points data
+    points, and those whose fits are out of the valid parameter range or
+    have a sigma above sigma_threshold, are pruned before their distances,
+    which take most of the time, are calculated.
+
+    Returns
+    -------
+    profiles : array
+        The distances, alphas and sigmas of the windows, stacked in an array
+        of shape (3, len(xmaxs), len(xmins)). Windows that were pruned have
+        a distance of nan, and those without enough data points have an
+        alpha and sigma of nan as well.
+    """
+    from numpy import asarray, searchsorted, log, full, nan, flatnonzero
+    xmins = asarray(xmins, dtype='float')
+    xmaxs = asarray(xmaxs, dtype='float')
+    starts = searchsorted(data, xmins, side='left')
+    log_xmins = log(xmins)
+    profiles = full((3, len(xmaxs), len(xmins)), nan)
+    for row, xmax in enumerate(xmaxs):
+        stop = searchsorted(data, xmax, side='right')
+        n = stop - starts
+#With xmin below xmax, both are in the window, which so has at least two
+#unique values
+        candidates = flatnonzero((xmins < xmax) * (n >= max(min_points, 2)))
+        if not len(candidates):
+            continue
+        alphas, sigmas = _power_law_window_alphas(
+            log_xmins[candidates], log(xmax),
+            log_sums[stop] - log_sums[starts[candidates]], n[candidates])
+        profiles[1, row, candidates] = alphas
+        profiles[2, row, candidates] = sigmas
+        good_values = _good_xmins(
+            _power_law_in_range(alphas, sigmas, parameter_range), sigmas,
+            sigma_threshold)
+        if good_values.any():
+            profiles[0, row, candidates[good_values]] = _power_law_ks_scan(
+                bins, Actual_CDF, xmins[candidates[good_values]],
+                alphas[good_values], distances=(distance,), memory=memory,
+                xmax=xmax)[distance]
+    return profiles
+
+def _power_law_binned_scan(data, n_bins, lower, upper, memory=2**23):
+    """
+    Approximates the xmin search of a continuous power law from the data
+    bucketed into n_bins log-spaced bins, from lower to the largest value in
+    the data. The candidate xmins are the first values in each bin up to
+    upper.
+
+    The fit for each candidate is exact, from the bins' sums of log(data).
+    The empirical CDF is known exactly at the first value in each bin, so D
+    calculated there is a lower bound on the exact D. Between these values
+    both CDFs only rise, so the largest difference within each bin is at
+    most that between the empirical CDF at one end and the theoretical CDF
+    at the other, which gives an upper bound. D and its bounds take time in
+    proportion to the number of bins for each candidate.
+
+    Parameters
+    ----------
+    data : array
+        The data, sorted in increasing order.
+    n_bins : int
+    lower, upper : float
+        The range of candidate xmins.
+    memory : int, optional
+        The approximate number of bytes of memory used at once by the
+        distances. 2**23 by default.
+
+    Returns
+    -------
+    positions : array of ints
+        The index in data of each candidate xmin.
+    alphas, sigmas : arrays
+        The fit for each candidate.
+    Ds : array
+        The lower bound on D for each candidate.
+    D_errors : array
+        The upper bound on D minus the lower bound.
+    """
+    from numpy import geomspace, searchsorted, unique, append, log, cumsum, \
+        sqrt, exp, empty, maximum, abs, arange
+    n = len(data)
+    edges = geomspace(lower, data[-1], n_bins+1)
+#Empty bins are merged with the next ones
+    positions = unique(searchsorted(data, edges, side='left'))
+    positions = positions[positions < n]
+    bounds = append(positions, n)
+    log_sums = [log(data[start:stop]).sum()
+                for start, stop in zip(bounds[:-1], bounds[1:])]
+    tail_log_sums = cumsum(log_sums[::-1])[::-1]
+    n_tails = n - positions
+    firsts = data[positions]
+    lasts = data[bounds[1:]-1]
+
+#Candidates must leave at least two unique values in the tail
+    candidates = arange((firsts <= upper).sum())
+    candidates = candidates[firsts[candidates] < data[-1]]
+    xmins = firsts[candidates]
+    alphas = (1 + n_tails[candidates] /
+              (tail_log_sums[candidates] -
+               n_tails[candidates]*log(xmins)))
+    sigmas = (alphas - 1) / sqrt(n_tails[candidates])
+
+    Ds = empty(len(candidates))
+    D_errors = empty(len(candidates))
+    block_size = max(1, int(memory // (8 * 8 * len(positions))))
+    for block_start in range(0, len(candidates), block_size):
+        block = slice(block_start, block_start+block_size)
+        rows = candidates[block]
+        exponents = (alphas[block] - 1)[:,None]
+        log_xmins = log(xmins[block])[:,None]
+        n_tail = n_tails[rows][:,None]
+#The tail's empirical CDF at the first value in each bin, and its largest
+#value within the bin, just below the first value in the next bin
+        F_first = (positions[None,:] - positions[rows][:,None]) / n_tail
+        F_last = (bounds[None,1:] - positions[rows][:,None]) / n_tail
+        T_first = 1 - exp(exponents * (log_xmins - log(firsts)[None,:]))
+        T_last = 1 - exp(exponents * (log_xmins - log(lasts)[None,:]))
+        lower_Ds = abs(T_first - F_first)
+        upper_Ds = maximum(T_last - F_first, F_last - T_first)
+#Bins below each candidate are not part of its tail
+        below = arange(len(positions))[None,:] < rows[:,None]
+        lower_Ds[below] = 0
+        upper_Ds[below] = 0
+        Ds[block] = lower_Ds.max(axis=1)
+        D_errors[block] = upper_Ds.max(axis=1) - Ds[block]
+    return positions[candidates], alphas, sigmas, Ds, D_errors
+
+def _power_law_in_range(alphas, sigmas, parameter_range=None):
+    """
+    Whether each of many power law fits is within the range of valid
+    parameters, as in Distribution.in_range.
+    """
+    if not parameter_range:
+        return alphas>1
+    values = {'alpha': alphas, 'sigma': sigmas}
+    in_range = alphas==alphas
+    for k in parameter_range.keys():
+        lower_bound, upper_bound = parameter_range[k]
+        if upper_bound is not None:
+            in_range *= values[k] < upper_bound
+        if lower_bound is not None:
+            in_range *= values[k] > lower_bound
+    return in_range
+
+def _power_law_ks_scan(bins, Actual_CDF, xmins, alphas, discrete=False,
+                       distances=('D',), memory=2**23, xmax=None):
+    """
+    The distances between the empirical CDF of the data and power law fits
+    with many candidate xmins, calculated as in Distribution.KS.
+
+    The distances are calculated for blocks of candidates at once, each
+    block holding one row per candidate and one column per unique data
+    value. The difference between the theoretical and empirical CDFs is
+    calculated once per block, and all the requested distances are reduced
+    from it. The number of candidates in a block is chosen so that the
+    block's arrays take up no more than roughly the given memory.
+
+    Parameters
+    ----------
+    bins : array
+        The sorted, unique values in the data.
+    Actual_CDF : array
+        The portion of the data that is less than each value in bins.
+    xmins : array
+        The candidate xmins, each of which is in bins.
+    alphas : array
+        The power law exponent fitted for each candidate xmin.
+    discrete : bool, optional
+        Whether the data is discrete (integers).
+    distances : tuple of strings, optional
+        Which of 'D', 'D_plus', 'D_minus', 'V', 'Kappa' and 'Asquare' to
+        calculate. ('D',) by default.
+    memory : int, optional
+        The approximate number of bytes of memory used by each block of
+        candidates. 2**23 by default.
+    xmax : float, optional
+        The largest value of the fitted window. The power laws are truncated
+        to it, and the empirical CDF is renormalized to the data between each
+        candidate xmin and xmax. Each candidate xmin must be below xmax.
+
+    Returns
+    -------
+    distances : dict
+        An array for each requested distance, with a value for each
+        candidate xmin.
+    """
+    from numpy import searchsorted, empty, where, log, exp, asarray
+    from numpy import subtract, multiply, arange
+    xmins = asarray(xmins, dtype='float')
+    alphas = asarray(alphas, dtype='float')
+    starts = searchsorted(bins, xmins, side='left')
+    num_xmins = len(xmins)
+    results = dict((name, empty(num_xmins)) for name in distances)
+    extrema = bool(set(distances) & set(('D', 'D_plus', 'D_minus', 'V')))
+#The window of values that are fitted ends at xmax, and top is the portion of
+#the data at or below it
+    end = len(bins)
+    top = 1
+    if xmax is not None:
+        end = searchsorted(bins, xmax, side='right')
+        if end < len(bins):
+            top = Actual_CDF[end]
+
+#Roughly three float arrays of the block's size are alive at once, or four
+#with Asquare's weights
+    width = end
+    if discrete:
+#Plus the cumulative sums of the discrete power law's terms, see
+#_zeta_partial_sums. Their extent is set by the data alone, so that the
+#distances don't depend on how the candidates are split into blocks.
+        width += max(4*len(bins), 1024)
+        max_summed = bins[0] + max(4*len(bins), 1024)
+    n_arrays = 4 if 'Asquare' in results else 3
+    block_size = max(1, int(memory // (8 * n_arrays * width)))
+    log_bins = log(bins)
+    for block_start in range(0, num_xmins, block_size):
+        block = slice(block_start, block_start+block_size)
+        first = starts[block].min()
+        offsets = starts[block] - first
+        rows = arange(len(offsets))
+        scale = 1 / (top - Actual_CDF[starts[block]])
+#The difference between the theoretical CDF and the empirical CDF, each
+#renormalized to the tail above xmin. For a continuous power law this is
+#(1-Actual_CDF)/(1-dropped_probability) - (X/xmin)**(1-alpha)
+        if discrete:
+            Theoretical_CDF = _power_law_cdf_block(bins[first:end],
+                                                   xmins[block],
+                                                   alphas[block], discrete,
+                                                   xmax=xmax,
+                                                   max_summed=max_summed)
+            CDF_diff = Theoretical_CDF + (scale *
+                                          Actual_CDF[starts[block]])[:,None]
+            CDF_diff -= multiply.outer(scale, Actual_CDF[first:end])
+            if 'Asquare' in results:
+                weights = 1 - Theoretical_CDF
+                weights *= Theoretical_CDF
+            del Theoretical_CDF
+        else:
+#E is 1 - Theoretical_CDF
+            E = subtract.outer(log(xmins[block]), log_bins[first:end])
+            E *= (alphas[block] - 1)[:,None]
+            exp(E, out=E)
+            if xmax is not None:
+#Truncated at xmax, 1 - Theoretical_CDF is (E - E_max)/(1 - E_max), where
+#E_max is (xmax/xmin)**(1-alpha)
+                E_max = exp((alphas[block] - 1) *
+                            (log(xmins[block]) - log(xmax)))
+                E -= E_max[:,None]
+                E /= (1 - E_max)[:,None]
+            CDF_diff = multiply.outer(scale, top - Actual_CDF[first:end])
+            CDF_diff -= E
+            if 'Asquare' in results:
+                weights = 1 - E
+                weights *= E
+            del E
+
+        if 'Asquare' in results:
+#The tail's first value is left out of Asquare, as in Distribution.KS
+            weights += 1e-12
+            squares = CDF_diff**2
+            squares /= weights
+            del weights
+            for row, start in enumerate(offsets):
+                squares[row, :start+1] = 0
+            results['Asquare'][block] = squares.sum(axis=1)
+            del squares
+
+#Values below each candidate's xmin are not part of its tail. Overwriting them
+#with the first value in the tail leaves the maximum and minimum unchanged,
+#and adds that value once for each of them to the sum.
+        for row, start in enumerate(offsets):
+            CDF_diff[row, :start] = CDF_diff[row, start]
+        if 'Kappa' in results:
+            first_values = CDF_diff[rows, offsets]
+            tail_sums = CDF_diff.sum(axis=1) - offsets*first_values
+            results['Kappa'][block] = 1 + tail_sums / (end - starts[block])
+        if extrema:
+            D_plus = CDF_diff.max(axis=1)
+            D_minus = -1.0*CDF_diff.min(axis=1)
+            for name, values in (('D_plus', D_plus),
+                                 ('D_minus', D_minus),
+                                 ('D', where(D_plus>D_minus, D_plus, D_minus)),
+                                 ('V', D_plus + D_minus)):
+                if name in results:
+                    results[name][block] = values
+    return results
+
+def _power_law_cdf_block(X, xmins, alphas, discrete=False, xmax=None,
+                         max_summed=None):
+    """
+    The theoretical CDF of power laws with each of the given xmins and
+    alphas, and the xmax if given, evaluated at the sorted values X. Returns
+    one row per xmin. Values of X below a row's xmin are meaningless and
+    should be masked by the caller.
+    """
+    if not discrete:
+        CDF = 1 - (X[None,:]/xmins[:,None])**(-alphas[:,None]+1)
+        if xmax is not None:
+            CDF /= (1 - (xmax/xmins)**(-alphas+1))[:,None]
+        return CDF
+    return _power_law_discrete_cdf(alphas, xmins, X, xmax=xmax,
+                                   max_summed=max_summed)
+
+def _power_law_discrete_cdf(alphas, xmins, X, xmax=None, max_summed=None):
+    """
+    The CDF of discrete power laws, 1 - zeta(alpha, X)/zeta(alpha, xmin), or
+    with an xmax, (zeta(alpha, xmin) - zeta(alpha, X)) /
+    (zeta(alpha, xmin) - zeta(alpha, xmax)). Returns one row per alpha and
+    xmin, and one column per value of the sorted array X. Values of X below
+    a row's xmin have a CDF of 0.
+
+    If zeta(alpha, xmin) is too small to be represented, we lack the numerical
+    accuracy to calculate this tail. The CDF is then all ones, indicating
+    we're at the end of the tail, and such an xmin is thrown out by the KS
+    test. See _zeta_partial_sums for max_summed.
+    """
+    from numpy import asarray, where, append
+    alphas = asarray(alphas, dtype='float')
+    X = asarray(X, dtype='float')
+    if xmax:
+        sums, zeta_xmins = _zeta_partial_sums(alphas, xmins, append(X, xmax),
+                                              max_summed=max_summed)
+        norm = sums[:,-1:]
+        sums = sums[:,:-1]
+    else:
+        sums, zeta_xmins = _zeta_partial_sums(alphas, xmins, X,
+                                              max_summed=max_summed)
+        norm = zeta_xmins[:,None]
+    out_of_precision = norm==0
+    CDF = sums / where(out_of_precision, 1, norm)
+    return where(out_of_precision, 1.0, CDF)
+
+def _zeta_partial_sums(alphas, xmins, X, max_summed=None):
+    """
+    The partial sums zeta(alpha, xmin) - zeta(alpha, X) of the Hurwitz zeta
+    function, which are the sums of k**-alpha for k from xmin to X-1.
+
+    The recurrence zeta(alpha, x+1) = zeta(alpha, x) - x**-alpha means a
+    single evaluation of zeta at xmin and a cumulative sum of k**-alpha give
+    the partial sums for all integers above it. The cumulative sum is taken
+    over the integers from the smallest xmin up to max_summed, and zeta is
+    only evaluated directly for values of X beyond that. If X and xmins are
+    not all an integer apart, zeta is evaluated directly everywhere.
+
+    Parameters
+    ----------
+    alphas : array
+        The exponent of each row.
+    xmins : array
+        The lower limit of each row.
+    X : array
+        Sorted values at which to calculate the partial sums.
+    max_summed : float, optional
+        The largest value of X to take from the cumulative sum. If None, it
+        is the smallest xmin plus max(4*len(X), 1024).
+
+    Returns
+    -------
+    sums : array
+        The partial sums, with one row per alpha and xmin and one column per
+        value of X. Values of X at or below a row's xmin give 0.
+    zeta_xmins : array
+        zeta(alpha, xmin) for each row.
+    """
+    from numpy import asarray, arange, cumsum, empty, zeros, floor, maximum
+    from numpy import searchsorted, concatenate
+    from scipy.special import zeta
+    alphas = asarray(alphas, dtype='float')
+    xmins = asarray(xmins, dtype='float')
+    X = asarray(X, dtype='float')
+    zeta_xmins = zeta(alphas, xmins)
+    sums = empty((len(alphas), len(X)))
+    if not len(X) or not len(alphas):
+        return sums, zeta_xmins
+
+    start = xmins.min()
+    offsets = concatenate((X, xmins)) - start
+    if (floor(offsets)!=offsets).any():
+        n_summed = 0
+    else:
+        if max_summed is None:
+            max_summed = start + max(4*len(X), 1024)
+        n_summed = searchsorted(X, max_summed, side='right')
+
+    if n_summed:
+#The terms k**-alpha for each row, zeroed below the row's xmin, and their
+#cumulative sums. partial[:,i] is the sum of the terms for k < start+i.
+        k = arange(start, X[n_summed-1])
+        terms = k[None,:]**-alphas[:,None]
+        terms[k[None,:] < xmins[:,None]] = 0
+        partial = zeros((len(alphas), len(k)+1))
+        cumsum(terms, axis=1, out=partial[:,1:])
+        del terms
+        index = maximum(X[:n_summed] - start, 0).astype(int)
+        sums[:,:n_summed] = partial[:,index]
+    if n_summed < len(X):
+        sums[:,n_summed:] = (zeta_xmins[:,None] -
+                             zeta(alphas[:,None], X[None,n_summed:]))
+        sums[:,n_summed:][X[None,n_summed:] <= xmins[:,None]] = 0
+    return sums, zeta_xmins
+
+def _discrete_sum(function, xmin, upper_limit, cutoff=4096, n_nodes=20):
+    """
+    The sum of function(x) over x = xmin, xmin+1, ... up to upper_limit, the
+    normalizer of discrete distributions without a closed form, with memory
+    bounded however far upper_limit is.
+
+    The first cutoff terms are summed exactly. The rest, from a = xmin+cutoff
+    to b, are given by Gregory's form of the Euler-Maclaurin formula,
+    sum(f) = integral(f, a, b) + (f(a) + f(b))/2 +
+    sum_j g_j*(backward_j f(b) + (-1)**j forward_j f(a)),
+    with the j-th finite differences of f at the ends of the tail, up to
+    j=5. Its error is of the order of the next term, 0.011 times the sixth
+    differences. These fall as f/a**6 for functions that vary over the
+    scale of x, as power laws and lognormals do, and as f(a) times the
+    sixth power of the decay rate for exponential ones, so they are far
+    below the rounding error of the exact sum for the distributions here. The
+    integral is taken by Gauss-Legendre quadrature with n_nodes nodes over
+    panels whose ends double from a to b, which is accurate to rounding for
+    functions smooth over the scale of x.
+
+    Parameters
+    ----------
+    function : function
+        Evaluated on arrays of values, such as a _pdf_base_function.
+    xmin : float
+    upper_limit : float
+        The terms are those of arange(xmin, upper_limit+1).
+    cutoff : int, optional
+        The number of terms summed exactly. If there are fewer than twice
+        as many terms, all are summed exactly.
+    n_nodes : int, optional
+
+    Returns
+    -------
+    total : float
+    """
+    from numpy import arange, asarray, ceil, log2, append, diff, sum
+    from numpy.polynomial.legendre import leggauss
+    n_terms = int(ceil(upper_limit + 1 - xmin))
+    if n_terms <= 2*cutoff:
+        return sum(asarray(function(xmin + arange(n_terms)), dtype='float'))
+
+    total = sum(asarray(function(xmin + arange(cutoff)), dtype='float'))
+    a = xmin + cutoff
+    b = xmin + n_terms - 1
+    n_panels = max(int(ceil(log2(b/a))), 1)
+    edges = append(a*2.**arange(n_panels), b)
+    nodes, weights = leggauss(n_nodes)
+    half_widths = diff(edges)[:,None]/2
+    centers = edges[:-1,None] + half_widths
+    total += sum(weights * half_widths *
+                 asarray(function(centers + half_widths*nodes), dtype='float'))
+
+    gregory = [1/12., 1/24., 19/720., 3/160., 863/60480.]
+    head = asarray(function(a + arange(6)), dtype='float')
+    end = asarray(function(b - arange(6)), dtype='float')
+    total += (head[0] + end[0])/2
+    for j, g in enumerate(gregory, 1):
+#The backward differences at b are the forward differences of the values
+#from b downwards, times (-1)**j
+        total += g*(-1)**j*(diff(end, n=j)[0] + diff(head, n=j)[0])
+    return total
+
+def _print_xmin_progress(done, total, best_distance, elapsed):
+    """
+    The default report of the progress of Fit.find_xmin, when verbose.
+    """
+    print('xmin progress: {:02d}%'.format(int(done/total * 100)), end='\r')
+
+def _log_spaced_candidates(xmins, candidates, n):
+    """
+    The indices, among candidates, of up to n candidate xmins spaced evenly
+    in log(xmin), including the smallest and largest. candidates must index
+    xmins in increasing order.
+    """
+    from numpy import geomspace, searchsorted, unique, asarray
+    candidates = asarray(candidates)
+    values = xmins[candidates]
+    if len(candidates) <= n:
+        return candidates
+    targets = geomspace(values[0], values[-1], n)
+    positions = searchsorted(values, targets).clip(0, len(values)-1)
+    return candidates[unique(positions)]
+
+def _quantile_spaced_candidates(xmin_indices, n_data, n):
+    """
+    The indices of up to n candidate xmins spaced evenly in the quantiles of
+    the data, given the index in the sorted data of each candidate.
+    """
+    from numpy import searchsorted, linspace, unique
+    positions = searchsorted(xmin_indices, linspace(0, n_data-1, n))
+    return unique(positions.clip(0, len(xmin_indices)-1))
+
+def _coarse_to_fine_order(n):
+    """
+    An ordering of n evenly spaced items in which every prefix is spread
+    over the whole range: every 2**k th item for decreasing k.
+    """
+    from numpy import arange, argsort
+    items = arange(n)
+    spacing = items & -items
+    spacing[0] = 2*n
+    return argsort(-spacing, kind='stable')
+
+class _Xmin_Deadline(Exception):
+    """
+    Raised to end an xmin search whose time limit has passed.
+    """
+    pass
+
+def _good_xmins(in_ranges, sigmas, sigma_threshold=None):
+    """
+    Which candidate xmins gave fits in the valid parameter range and, if a
+    sigma_threshold is given, with standard errors below it.
+    """
+    good_values = in_ranges.copy()
+    if sigma_threshold:
+        good_values *= sigmas < sigma_threshold
+    return good_values
+
+def _select_xmin(Ds, good_values, evaluated=None):
+    """
+    The index of the candidate xmin with the smallest distance among the
+    good evaluated candidates. If no candidate is good, it is the smallest
+    among all evaluated candidates and the noise flag is set. Candidates
+    whose distance could not be calculated (nan) are never chosen.
+
+    Returns
+    -------
+    index : int
+    noise_flag : bool
+    """
+    from numpy.ma import masked_array
+    from numpy import isnan
+    if evaluated is None:
+        from numpy import ones
+        evaluated = ones(len(Ds), dtype=bool)
+    evaluated = evaluated * ~isnan(Ds)
+    good_values = good_values * evaluated
+    if good_values.any():
+        return masked_array(Ds, mask=~good_values).argmin(), False
+    return masked_array(Ds, mask=~evaluated).argmin(), True
+
+def _fit_xmin_candidate(parent_Fit, xmin, distances, distribution=None,
+                        **kwargs):
+    """
+    Fits a distribution to the data at and above a candidate xmin, as done
+    for every candidate in Fit.find_xmin.
+
+    Returns
+    -------
+    fit : tuple
+        The first of distances between the data and the fit, the fit's
+        alpha and sigma (nan if the distribution has no such parameters),
+        whether the fit is within the range of valid parameters, and the rest
+        of distances.
+    """
+    dist = distribution(xmin=xmin,
+                        data=parent_Fit.data,
+                        parent_Fit=parent_Fit,
+                        **kwargs)
+    return _xmin_fit_result(dist, distances)
+
+def _xmin_fit_result(dist, distances):
+    from numpy import nan
+    if not hasattr(dist, 'sigma'):
+        dist.sigma = nan
+    if not hasattr(dist, 'alpha'):
+        dist.alpha = nan
+    return ((getattr(dist, distances[0]), dist.alpha, dist.sigma,
+             dist.in_range()) +
+            tuple(getattr(dist, name) for name in distances[1:]))
+
+def _fit_xmin_candidates(parent_Fit, xmins, distances, sweep=False,
+                         progress=None, distribution=None, **kwargs):
+    """
+    Fits a distribution to the data at and above each candidate xmin, as
+    _fit_xmin_candidate does. With sweep, the candidates are fitted in
+    increasing order and each fit starts from the parameters of the previous
+    candidate's fit, if they were valid, instead of the distribution's
+    initial estimate. Neighboring tails differ by a few data points, so the
+    optimizer starts close to the optimum. Fits whose distance is nan are not
+    continued from.
+
+    progress, if given, is called with the index of each candidate, the
+    number of candidates, and the candidate's fit after it is fitted.
+
+    Returns
+    -------
+    fits : list of tuples
+        The result of _fit_xmin_candidate for each candidate.
+    """
+    from numpy import isfinite
+    fits = []
+    initial_parameters = None
+    for idx, xmin in enumerate(xmins):
+        dist = distribution(xmin=xmin,
+                            data=parent_Fit.data,
+                            parent_Fit=parent_Fit,
+                            initial_parameters=initial_parameters,
+                            **kwargs)
+        fits.append(_xmin_fit_result(dist, distances))
+        if progress is not None:
+            progress(idx, len(xmins), fits[-1])
+#Don't carry on from fits gone so far into extreme parameters that their
+#distance can't be calculated
+        if sweep and dist.in_range() and isfinite(fits[-1][0]):
+            initial_parameters = [getattr(dist, 'parameter{}'.format(i))
+                                  for i in (1, 2, 3)
+                                  if getattr(dist, 'parameter{}_name'.format(i))
+                                  is not None]
+        else:
+            initial_parameters = None
+    return fits
+
+class _Shared_Fit(object):
+    """
+    Stands in for the parent Fit of the Distribution objects fitted in a
+    worker process, holding the data Distributions use from a Fit.
+    """
+    def __init__(self, data, fitting_cdf_bins, fitting_cdf):
+        self.data = data
+        self.fitting_cdf_bins = fitting_cdf_bins
+        self.fitting_cdf = fitting_cdf
+
+def _share_arrays(arrays):
+    """
+    Copies arrays into one block of shared memory, from which worker
+    processes can read them without each being sent a pickled copy.
+
+    Returns
+    -------
+    shared : multiprocessing.shared_memory.SharedMemory
+        The block of shared memory. The caller must close and unlink it once
+        the workers are done.
+    description : tuple
+        The name of the block and the length of each array, with which
+        _attach_shared_arrays finds them.
+    """
+    from multiprocessing import shared_memory
+    from numpy import ndarray, asarray
+    arrays = [asarray(a, dtype='float') for a in arrays]
+    lengths = tuple(len(a) for a in arrays)
+    shared = shared_memory.SharedMemory(create=True,
+                                        size=max(8, 8*sum(lengths)))
+    offset = 0
+    for a in arrays:
+        ndarray(len(a), dtype='float', buffer=shared.buf, offset=offset)[:] = a
+        offset += 8*len(a)
+    return shared, (shared.name, lengths)
+
+def _attach_shared_arrays(description):
+    """
+    Read-only views of arrays published with _share_arrays. Returns the
+    block of shared memory, which must be closed once the views are deleted,
+    and the list of arrays.
+    """
+    from multiprocessing import shared_memory
+    from numpy import ndarray
+    name, lengths = description
+    shared = shared_memory.SharedMemory(name=name)
+    arrays = []
+    offset = 0
+    for length in lengths:
+        a = ndarray(length, dtype='float', buffer=shared.buf, offset=offset)
+        a.flags.writeable = False
+        arrays.append(a)
+        offset += 8*length
+    return shared, arrays
+
+def _close_shared_arrays(shared):
+    try:
+        shared.close()
+    except BufferError:
+#Something, like a traceback, still refers to the arrays. The memory is
+#released when this process exits.
+        pass
+
+def _ks_scan_worker(description, xmins, alphas, options):
+    shared, (bins, Actual_CDF) = _attach_shared_arrays(description)
+    try:
+        return _power_law_ks_scan(bins, Actual_CDF, xmins, alphas, **options)
+    finally:
+        del bins, Actual_CDF
+        _close_shared_arrays(shared)
+
+def _window_scan_worker(description, xmins, xmaxs, options):
+    shared, (data, log_sums, bins, Actual_CDF) = _attach_shared_arrays(
+        description)
+    try:
+        return _power_law_window_scan(data, log_sums, bins, Actual_CDF,
+                                      xmins, xmaxs, **options)
+    finally:
+        del data, log_sums, bins, Actual_CDF
+        _close_shared_arrays(shared)
+
+def _xmin_fits_worker(description, xmins, distances, options):
+    shared, (data, bins, Actual_CDF) = _attach_shared_arrays(description)
+    parent_Fit = _Shared_Fit(data, bins, Actual_CDF)
+    try:
+        return _fit_xmin_candidates(parent_Fit, xmins, distances, **options)
+    finally:
+        del parent_Fit, data, bins, Actual_CDF
+        _close_shared_arrays(shared)
+
+def _n_workers(n_jobs=1, executor=None):
+    """
+    The number of workers given an n_jobs option, where -1 means one per
+    processor. An executor with the default n_jobs of 1 is also assumed to
+    have one worker per processor.
+    """
+    if n_jobs is None or n_jobs < 1 or (n_jobs==1 and executor is not None):
+        from multiprocessing import cpu_count
+        return cpu_count()
+    return n_jobs
+
+def _split_candidates(costs, n_jobs=1, executor=None):
+    """
+    Splits candidates into contiguous chunks of roughly equal total cost,
+    several per worker so that the workers stay busy.
+
+    Returns
+    -------
+    chunks : list of slices
+    """
+    from numpy import cumsum, searchsorted, linspace, unique, asarray
+    costs = asarray(costs, dtype='float')
+    if not len(costs):
+        return []
+    n_chunks = min(len(costs), 4*_n_workers(n_jobs, executor))
+    total = cumsum(costs)
+    bounds = searchsorted(total, linspace(0, total[-1], n_chunks+1)[1:-1])
+    bounds = unique([0] + list(bounds) + [len(costs)])
+    return [slice(start, stop) for start, stop in zip(bounds[:-1], bounds[1:])]
+
+def _timed_call(function, *args):
+    from time import perf_counter
+    start = perf_counter()
+    result = function(*args)
+    return result, perf_counter() - start
+
+def _xmin_backend(backend=None, executor=None):
+    """
+    Whether the xmin search runs in 'threads' or 'processes'. A thread pool
+    given as the executor implies threads.
+    """
+    from concurrent.futures import ThreadPoolExecutor
+    if backend is None:
+        if isinstance(executor, ThreadPoolExecutor):
+            return 'threads'
+        return 'processes'
+    if backend not in ('threads', 'processes'):
+        raise ValueError("xmin_backend must be 'threads' or 'processes'")
+    return backend
+
+def _map_chunks(function, arguments, n_jobs=1, executor=None,
+                backend='processes'):
+    """
+    Calls function with each tuple in arguments in a pool of worker processes
+    or threads, or in the given executor, and returns the results in order.
+
+    Returns
+    -------
+    results : list
+    work_time : float
+        The total time spent in the calls, summed over the workers. Compared
+        to the time taken to get all the results, this is the speedup over
+        making the calls one after another.
+    """
+    from itertools import repeat
+    if not arguments:
+        return [], 0.0
+    if executor is None:
+        if backend=='threads':
+            from concurrent.futures import ThreadPoolExecutor as Pool
+        else:
+            from concurrent.futures import ProcessPoolExecutor as Pool
+        with Pool(max_workers=_n_workers(n_jobs)) as pool:
+            timed = list(pool.map(_timed_call, repeat(function),
+                                  *zip(*arguments)))
+    else:
+        timed = list(executor.map(_timed_call, repeat(function),
+                                  *zip(*arguments)))
+    return ([result for result, elapsed in timed],
+            sum(elapsed for result, elapsed in timed))
+
+def _unique_values(data):
+    """
+    The unique values of the data, the index of each data point's value
+    among them and the number of data points with each, as numpy.unique
+    returns them. Data is usually already sorted, which is checked in one
+    pass and then needs no sort.
+    """
+    from numpy import asarray, unique, flatnonzero, concatenate, diff, repeat
+    from numpy import arange
+    data = asarray(data)
+    if len(data) and (data[1:] >= data[:-1]).all():
+        starts = concatenate(([0], flatnonzero(data[1:] != data[:-1]) + 1))
+        counts = diff(concatenate((starts, [len(data)])))
+        return data[starts], repeat(arange(len(starts)), counts), counts
+    return unique(data, return_inverse=True, return_counts=True)
+
+def _batch_nelder_mead(function, starts, xtol=1e-4, ftol=1e-4,
+                       maxiter=None):
+    """
+    Minimizes function from each row of starts with the Nelder-Mead simplex
+    of scipy.optimize.fmin, with its initial simplices, coefficients and
+    tolerances. The simplices are moved in lock step: each step makes at most
+    four calls to function, each with a 2D array of the new points of all the
+    simplices, one per row, so a vectorized function evaluates them
+    together. Each simplex stops once it has converged.
+
+    Returns
+    -------
+    points : array
+        The best point of the simplex from each start.
+    values : array
+        The value of function at each point.
+    """
+    from numpy import (asarray, repeat, where, isnan, inf, ones, full,
+                       argsort, take_along_axis, flatnonzero, arange)
+    starts = asarray(starts, dtype=float)
+    n_starts, N = starts.shape
+    if maxiter is None:
+        maxiter = 200*N
+    rho, chi, psi, sigma = 1, 2, .5, .5
+
+    def evaluate(points):
+        values = asarray(function(points), dtype=float)
+        return where(isnan(values), inf, values)
+
+    simplices = repeat(starts[:, None, :], N+1, axis=1)
+    for j in range(N):
+        simplices[:, j+1, j] = where(starts[:, j] != 0, 1.05*starts[:, j],
+                                     .00025)
+    values = evaluate(simplices.reshape(-1, N)).reshape(n_starts, N+1)
+    active = ones(n_starts, dtype=bool)
+    for iteration in range(maxiter):
+        order = argsort(values, axis=1, kind='stable')
+        simplices = take_along_axis(simplices, order[:, :, None], axis=1)
+        values = take_along_axis(values, order, axis=1)
+        active &= ~(
+            (abs(simplices[:, 1:] - simplices[:, :1]).max(axis=(1, 2)) <= xtol) &
+            (abs(values[:, 1:] - values[:, :1]).max(axis=1) <= ftol))
+        moving = flatnonzero(active)
+        if not len(moving):
+            break
+        simplex = simplices[moving]
+        value = values[moving]
+        centroid = simplex[:, :-1].mean(axis=1)
+        worst = simplex[:, -1]
+
+        reflected = (1+rho)*centroid - rho*worst
+        f_reflected = evaluate(reflected)
+        expand = f_reflected < value[:, 0]
+        expanded = (1+rho*chi)*centroid - rho*chi*worst
+        f_expanded = full(len(moving), inf)
+        if expand.any():
+            f_expanded[expand] = evaluate(expanded[expand])
+        contract = ~expand & (f_reflected >= value[:, -2])
+        outside = contract & (f_reflected < value[:, -1])
+        contracted = where(outside[:, None],
+                           (1+psi*rho)*centroid - psi*rho*worst,
+                           (1-psi)*centroid + psi*worst)
+        f_contracted = full(len(moving), inf)
+        if contract.any():
+            f_contracted[contract] = evaluate(contracted[contract])
+
+        new_point = worst.copy()
+        new_value = value[:, -1].copy()
+        use = expand & (f_expanded < f_reflected)
+        new_point[use] = expanded[use]
+        new_value[use] = f_expanded[use]
+        use = (expand & ~(f_expanded < f_reflected)) | (~expand & ~contract)
+        new_point[use] = reflected[use]
+        new_value[use] = f_reflected[use]
+        use = ((outside & (f_contracted <= f_reflected)) |
+               (contract & ~outside & (f_contracted < value[:, -1])))
+        new_point[use] = contracted[use]
+        new_value[use] = f_contracted[use]
+        simplex[:, -1] = new_point
+        value[:, -1] = new_value
+
+        shrink = flatnonzero(contract & ~use)
+        if len(shrink):
+            shrunk = (simplex[shrink, :1] +
+                      sigma*(simplex[shrink, 1:] - simplex[shrink, :1]))
+            simplex[shrink, 1:] = shrunk
+            value[shrink, 1:] = evaluate(shrunk.reshape(-1, N)).reshape(
+                len(shrink), N)
+        simplices[moving] = simplex
+        values[moving] = value
+    best = values.argmin(axis=1)
+    return (simplices[arange(n_starts), best], values[arange(n_starts), best])
+
+def _log_upper_gamma(s, z, scaled=False, tolerance=1e-12, maxiter=1000):
+    """
+    The log of the upper incomplete gamma function, Gamma(s, z), for a real
+    shape s < 1 and each positive z, in floating point. This is the
+    normalizer of the truncated power law, with s = 1-alpha. Large z use the
+    continued fraction of Gamma(s, z)*exp(z)*z**-s, and small z recur down
+    from scipy's gammaincc or exp1 at the shape s+m in [0, 1), through
+    g(s) = (z*g(s+1) - 1)/s for g(s) = Gamma(s, z)*exp(z)*z**-s. Both are in
+    log space, so nothing overflows. The recurrence is stable for z < 1, but
+    loses precision when s+m is close to 1. Values whose estimated relative
+    error exceeds tolerance, or that don't converge, are calculated with
+    mpmath instead, and are nan if it can't. With scaled, returns the log of
+    Gamma(s, z)*exp(z)*z**-s, without the cancellation of adding z to the
+    log for large z.
+    """
+    from numpy import (asarray, atleast_1d, log, exp, full, zeros, ceil, nan,
+                       isfinite, where, flatnonzero)
+    from scipy.special import gammaincc, gammaln, exp1
+    z = asarray(z, dtype=float)
+    shape = z.shape
+    z = atleast_1d(z).ravel()
+    result = full(len(z), nan)
+    failed = ~(z > 0)
+
+    continued = flatnonzero(~failed & (z >= 1))
+    if len(continued):
+#The modified Lentz algorithm, for all points at once
+        x = z[continued]
+        tiny = 1e-300
+        b = x + 1 - s
+        c = full(len(x), 1/tiny)
+        d = 1/b
+        h = d.copy()
+        converged = zeros(len(x), dtype=bool)
+        for i in range(1, maxiter):
+            a = -i*(i - s)
+            b = b + 2
+            d = a*d + b
+            d = where(abs(d) < tiny, tiny, d)
+            c = b + a/c
+            c = where(abs(c) < tiny, tiny, c)
+            d = 1/d
+            delta = d*c
+            h = where(converged, h, h*delta)
+            converged |= abs(delta - 1) < 1e-16
+            if converged.all():
+                break
+        good = converged & (h > 0)
+        result[continued[good]] = log(h[good])
+        failed[continued[~good]] = True
+
+    steps = int(ceil(-s)) if s < 0 else 0
+    recurred = flatnonzero(~failed & (z < 1))
+    if len(recurred) and steps > maxiter:
+        failed[recurred] = True
+    elif len(recurred):
+        x = z[recurred]
+        s_base = s + steps
+        if s_base == 0:
+            log_G = log(exp1(x))
+        else:
+            log_G = log(gammaincc(s_base, x)) + gammaln(s_base)
+#Start from z*g(s_base), which is finite even where g(s_base) overflows, and
+#carry a bound on its absolute error
+        zg = exp(log_G + x + (1-s_base)*log(x))
+        g = zg/x
+        error = 1e-15*zg
+        for step in range(1, steps+1):
+            g = (zg - 1)/(s_base - step)
+            error = (error + 1e-16*(abs(zg) + 1))/abs(s_base - step)
+            zg = x*g
+            if step < steps:
+                error = x*error
+        good = (g > 0) & isfinite(g)
+        if steps:
+            good &= error < tolerance*abs(g)
+        result[recurred[good]] = log(g[good])
+        failed[recurred[~good]] = True
+
+    if not scaled:
+        result = result - z + s*log(z)
+    if failed.any():
+        from mpmath import gammainc, mpf
+        from mpmath import log as mplog
+        for i in flatnonzero(failed):
+            G = gammainc(s, z[i])
+            if isinstance(G, mpf) and G > 0:
+                result[i] = float(mplog(G))
+                if scaled:
+                    result[i] += z[i] - s*log(z[i])
+    return result.reshape(shape)
+
+def _upper_gamma_log_derivatives(s, z, n_nodes=16):
+    """
+    The derivative by s of log(Gamma(s, z)), the upper incomplete gamma
+    function, and the ratio Gamma(s+1, z)/(z*Gamma(s, z)), for real s and
+    positive z, in floating point. They are nan where Gamma(s, z) is
+    infinite. These give the gradient of the truncated power law's log
+    likelihood.
+
+    With t = z*exp(v), Gamma(s, z) is z**s times the integral over v > 0 of
+    the weight w(v) = exp(s*v - z*exp(v)). The derivative of its log is
+    then log(z) plus the mean of v under w, and the ratio is the mean of
+    exp(v). log(w) is concave, so w falls off past its peak faster than
+    exponentially, and both means are taken by Gauss-Legendre quadrature
+    with n_nodes nodes over panels up to where exp(v)*w has fallen by
+    exp(-45) from its peak. The ratio is a mean of positive terms, which
+    avoids the cancellation of the recurrence
+    Gamma(s+1, z) = s*Gamma(s, z) + z**s*exp(-z) as z goes to 0.
+
+    Returns
+    -------
+    dlogG_ds : float
+    ratio : float
+    """
+    from numpy import (log, exp, expm1, linspace, sum, ceil, nan, inf, where,
+                       minimum)
+    from numpy.polynomial.legendre import leggauss
+    if not z > 0:
+#Gamma(s, 0) is the complete gamma function for positive s, and infinite
+#otherwise
+        if s > 0 and z == 0:
+            from scipy.special import digamma
+            return digamma(s), inf
+        return nan, nan
+#z*expm1(v) is taken in log space past v of 1, so that it doesn't overflow
+#for tiny z
+    log_z = log(z)
+    log_w = lambda v: s*v - where(v < 1, z*expm1(minimum(v, 1)),
+                                  exp(log_z + v) - z)
+#The integrals end where exp(v)*w, which falls off slowest, has fallen by
+#exp(-45) from its peak. The end is bracketed by doubling and then bisected.
+    log_tail = lambda v: v + log_w(v)
+    peak = log(s+1) - log_z if s+1 > z else 0.
+    floor = log_tail(peak) - 45
+    lower, upper = peak, peak + 1
+    while log_tail(upper) > floor:
+        lower, upper = upper, peak + 2*(upper - peak)
+    for i in range(60):
+        middle = (lower + upper)/2
+        if log_tail(middle) > floor:
+            lower = middle
+        else:
+            upper = middle
+    end = upper
+    edges = linspace(0, end, max(16, int(ceil(4*end))) + 1)
+    nodes, weights = leggauss(n_nodes)
+    half_widths = (edges[1:] - edges[:-1])[:,None]/2
+    v = edges[:-1,None] + half_widths*(nodes + 1)
+    weights = weights*half_widths
+    log_weights, log_tails = log_w(v), log_tail(v)
+    w = weights*exp(log_weights - log_weights.max())
+    tails = weights*exp(log_tails - log_tails.max())
+    ratio = exp(log_tails.max() - log_weights.max() + log(sum(tails)/sum(w)))
+    return log_z + sum(v*w)/sum(w), ratio
+
+def _log_lerch_phi(Lambda, alpha, a):
+    """
+    The log of the Lerch transcendent Phi(exp(-Lambda), alpha, a), the sum
+    over n >= 0 of exp(-Lambda*n)*(n+a)**-alpha, for positive Lambda and a, in
+    floating point. Terms are summed directly until the rest are negligible,
+    or until the terms change slowly enough for the rest of the sum to be its
+    integral, an upper incomplete gamma function, with five terms of the
+    Euler-Maclaurin correction. The sum is scaled by its first term, so
+    nothing overflows.
+    """
+    from numpy import arange, log, log1p, exp, expm1, ceil, inf
+    from scipy.special import binom, poch
+#Terms below exp(-39) of the first are negligible by n_direct
+    n_direct = inf
+    if Lambda > 0:
+        n_direct = 39/Lambda
+    if alpha > 0:
+        n_direct = min(n_direct, a*expm1(39/alpha))
+#The Euler-Maclaurin correction is accurate where Lambda + alpha/(n+a), the
+#rate of change of the log of the terms, is well below 2*pi
+    n_tail = inf
+    if Lambda < .25:
+        n_tail = max(8, alpha/(.25-Lambda) - a)
+    n = int(ceil(min(n_direct, n_tail)))
+    if n > 10**7:
+        raise ValueError("Too many terms for the Lerch transcendent")
+    log_scale = -alpha*log(a)
+    terms = exp(-Lambda*arange(n) - alpha*log1p(arange(n)/a))
+    total = terms.sum()
+    if n_tail <= n_direct:
+        u = n + a
+        log_f = -Lambda*n - alpha*log(u) - log_scale
+#The integral from n is exp(Lambda*a) * Lambda**(alpha-1) *
+#Gamma(1-alpha, Lambda*u), which is the term at n times u times the scaled
+#incomplete gamma function
+        integral = exp(log_f + log(u) +
+                       _log_upper_gamma(1-alpha, Lambda*u, scaled=True))
+        correction = .5
+        for bernoulli, j in ((1/6., 1), (-1/30., 3), (1/42., 5),
+                             (-1/30., 7), (5/66., 9)):
+#The j-th derivative of the terms, relative to the term at n
+            derivative = sum(binom(j, i) * (-Lambda)**(j-i) * (-1)**i *
+                             poch(alpha, i) * u**-i for i in range(j+1))
+            correction -= bernoulli/poch(1, j+1) * derivative
+        total += integral + exp(log_f)*correction
+    return log_scale + log(total)
+
+@lru_cache(maxsize=256)
+def _discrete_truncated_power_law_normalizer(alpha, Lambda, xmin, xmax=None):
+    """
+    The normalizer of the discrete truncated power law, as
+    Truncated_Power_Law._pdf_discrete_normalizer. Cached, as it is calculated
+    on every evaluation of the pdf while fitting. Calculated with
+    _log_lerch_phi, or with mpmath's lerchphi if that fails.
+    """
+    from numpy import exp, isfinite
+    try:
+        C = exp(xmin*Lambda - _log_lerch_phi(Lambda, alpha, xmin))
+        if xmax:
+            Cxmax = exp(xmax*Lambda - _log_lerch_phi(Lambda, alpha, xmax))
+            C = 1.0/(1.0/C - 1.0/Cxmax)
+        if not isfinite(C):
+            raise ValueError("Lerch transcendent out of range")
+    except (ValueError, ZeroDivisionError):
+        from mpmath import lerchphi
+        from mpmath import exp # faster /here/ than numpy.exp
+        C = ( float(exp(xmin * Lambda) /
+            lerchphi(exp(-Lambda), alpha, xmin)) )
+        if xmax:
+            Cxmax = ( float(exp(xmax * Lambda) /
+                lerchphi(exp(-Lambda), alpha, xmax)) )
+            C = 1.0/C - 1.0/Cxmax
+            C = 1.0/C
+    return float(C)
+
+class _Zeta_Tables(object):
+    """
+    Tables of the Hurwitz zeta function, zeta(alpha, xmin), over a grid of
+    alpha for each xmin, from which it is interpolated much faster than it is
+    calculated. They are built the first time each xmin is used, by any Fit
+    or Distribution in the process, and kept in _zeta_tables.
+
+    Each table is a cubic spline of g(alpha) =
+    log((alpha-1)*zeta(alpha, xmin)) + (alpha-1)*log(xmin), which is smooth
+    and near 0 from alpha of 1, where it is 0, to alpha_max, on a grid of the
+    given step. Its error is measured against zeta between the grid points,
+    and a table is only used if that is within tolerance. Otherwise, and for
+    alpha beyond the grid, zeta is calculated directly. At most max_tables
+    are kept, for the first xmins used, so that their memory is bounded;
+    zeta is calculated directly for xmins after those.
+
+    Each table is of 4*(alpha_max-1)/step floats, 64 kB by default, and
+    takes about 10 ms to build. Interpolating is then several times faster
+    than calculating zeta for arrays of hundreds of alphas and xmins, but
+    not for a few, where the overhead of either dominates.
+    """
+
+    def __init__(self, step=1/256., alpha_max=9., tolerance=1e-12,
+                 max_tables=64):
+        from numpy import arange
+        self.step = step
+        self.alpha_max = alpha_max
+        self.tolerance = tolerance
+        self.max_tables = max_tables
+        self.alphas = 1 + step*arange(int(round((alpha_max-1)/step))+1)
+        self.rows = {}
+        self.errors = {}
+        self.n_tables = 0
+        self.coefficients = None
+
+    def _build(self, xmin):
+        from numpy import log, concatenate, abs, empty
+        from scipy.special import zeta
+        from scipy.interpolate import CubicSpline
+        g = 0*self.alphas
+        g[1:] = (log((self.alphas[1:]-1)*zeta(self.alphas[1:], xmin)) +
+                 (self.alphas[1:]-1)*log(xmin))
+        spline = CubicSpline(self.alphas, g)
+        checked = concatenate((self.alphas[:-1] + self.step/4,
+                               self.alphas[:-1] + self.step/2))
+        error = abs(spline(checked) - (log(checked-1) +
+                                       (checked-1)*log(xmin) +
+                                       log(zeta(checked, xmin)))).max()
+        self.errors[xmin] = error
+        if not error <= self.tolerance:
+            self.rows[xmin] = -1
+            return
+        if self.coefficients is None:
+            self.coefficients = empty((self.max_tables, len(self.alphas)-1,
+                                       4))
+        self.rows[xmin] = self.n_tables
+        self.coefficients[self.n_tables] = spline.c.transpose()
+        self.n_tables += 1
+
+    def table_rows(self, xmins):
+        """
+        The row of the table of each xmin, building those not yet built. -1
+        where zeta is calculated directly.
+        """
+        from numpy import asarray, unique
+        xmins = asarray(xmins, dtype='float')
+        unique_xmins, inverse = unique(xmins, return_inverse=True)
+        for xmin in unique_xmins:
+            if xmin not in self.rows:
+                if xmin > 0 and self.n_tables < self.max_tables:
+                    self._build(float(xmin))
+                else:
+                    self.rows[float(xmin)] = -1
+        return asarray([self.rows[float(xmin)] for xmin in unique_xmins],
+                       dtype=int)[inverse].reshape(xmins.shape)
+
+    def log_zeta(self, alphas, xmins, rows=None):
+        """
+        log(zeta(alpha, xmin)) for arrays of alphas and xmins, with the rows
+        of their tables from table_rows, if already found.
+        """
+        from numpy import asarray, broadcast_arrays, log
+        from scipy.special import zeta
+        alphas, xmins = broadcast_arrays(asarray(alphas, dtype='float'),
+                                         asarray(xmins, dtype='float'))
+        shape = alphas.shape
+        if rows is None:
+            rows = self.table_rows(xmins)
+        rows = broadcast_arrays(rows, alphas)[0].ravel()
+        alphas = alphas.ravel()
+        xmins = xmins.ravel()
+        tabled = (rows >= 0) & (alphas > 1) & (alphas <= self.alpha_max)
+        if tabled.all():
+            return self._interpolate(alphas, xmins, rows).reshape(shape)
+        result = 0*alphas
+        direct = ~tabled
+        result[direct] = log(zeta(alphas[direct], xmins[direct]))
+        if tabled.any():
+            result[tabled] = self._interpolate(alphas[tabled], xmins[tabled],
+                                               rows[tabled])
+        return result.reshape(shape)
+
+    def _interpolate(self, alphas, xmins, rows):
+        from numpy import log, minimum
+        n_intervals = len(self.alphas) - 1
+        i = minimum(((alphas - 1)/self.step).astype(int), n_intervals-1)
+        c = self.coefficients.reshape(-1, 4)[rows*n_intervals + i]
+        d = alphas - self.alphas[i]
+        g = ((c[:, 0]*d + c[:, 1])*d + c[:, 2])*d + c[:, 3]
+        return g - log(alphas-1) - (alphas-1)*log(xmins)
+
+_zeta_tables = _Zeta_Tables()
+
 ######################
 #What follows are functional programming forms of the above code, which are more
 #clunky and have somewhat less functionality. However, they are here if your
@@ -2485,7 +5568,7 @@ def likelihood_function_generator(distribution_name, discrete=False, xmin=1, xma
 
     return likelihood_function
 
-def find_xmin(data, discrete=False, xmax=None, search_method='Likelihood', return_all=False, estimate_discrete=True, xmin_range=None):
+def find_xmin(data, discrete=False, xmax=None, search_method='Likelihood', return_all=False, estimate_discrete=True, xmin_range=None, n_jobs=1, executor=None):
     from numpy import sort, unique, asarray, argmin, vstack, arange, sqrt
     if 0 in data:
         print("Value 0 in data. Throwing out 0 values", file=sys.stderr)
@@ -2521,19 +5604,30 @@ def find_xmin(data, discrete=False, xmax=None, search_method='Likelihood', retur
 
     xmin_indices = xmin_indices[:-1]  # Don't look at last xmin, as that's also the xmax, and we want to at least have TWO points to fit!
 
-    if search_method == 'Likelihood':
-        alpha_MLE_function = lambda xmin: distribution_fit(data, 'power_law', xmin=xmin, xmax=xmax, discrete=discrete, search_method='Likelihood', estimate_discrete=estimate_discrete)
-        fits = asarray(list(map(alpha_MLE_function, xmins)))
-    elif search_method == 'KS':
-        alpha_KS_function = lambda xmin: distribution_fit(data, 'power_law', xmin=xmin, xmax=xmax, discrete=discrete, search_method='KS', estimate_discrete=estimate_discrete)[0]
-        fits = asarray(list(map(alpha_KS_function, xmins)))
+    if n_jobs != 1 or executor is not None:
+        #Split the candidates among worker processes, which read the data from shared memory
+        options = {'discrete': discrete, 'xmax': xmax, 'search_method': search_method, 'estimate_discrete': estimate_discrete}
+        chunks = _split_candidates(len(data) - xmin_indices, n_jobs, executor)
+        shared, description = _share_arrays((data,))
+        try:
+            results, work_time = _map_chunks(_functional_xmin_worker, [(description, xmins[chunk], options) for chunk in chunks], n_jobs, executor)
+        finally:
+            shared.close()
+            shared.unlink()
+        fits = asarray([fit for result in results for fit in result[0]], dtype=object)
+        Ds = asarray([D for result in results for D in result[1]])
+        params = fits[:, 0]
+        alphas = vstack(params)[:, 0]
+        loglikelihoods = fits[:, 1]
+    else:
+        fits = asarray([_functional_xmin_fit(data, xmin, discrete, xmax, search_method, estimate_discrete) for xmin in xmins], dtype=object)
 
-    params = fits[:, 0]
-    alphas = vstack(params)[:, 0]
-    loglikelihoods = fits[:, 1]
+        params = fits[:, 0]
+        alphas = vstack(params)[:, 0]
+        loglikelihoods = fits[:, 1]
 
-    ks_function = lambda index: power_law_ks_distance(data, alphas[index], xmins[index], xmax=xmax, discrete=discrete)
-    Ds = asarray(list(map(ks_function, arange(len(xmins)))))
+        ks_function = lambda index: power_law_ks_distance(data, alphas[index], xmins[index], xmax=xmax, discrete=discrete)
+        Ds = asarray(list(map(ks_function, arange(len(xmins)))))
 
     sigmas = (alphas - 1) / sqrt(len(data) - xmin_indices + 1)
     good_values = sigmas < .1
@@ -2561,6 +5655,24 @@ def find_xmin(data, discrete=False, xmax=None, search_method='Likelihood', retur
         return xmin, D, alpha, loglikelihood, n_tail, noise_flag, xmins, Ds, alphas, sigmas
 
 
+def _functional_xmin_fit(data, xmin, discrete, xmax, search_method, estimate_discrete):
+    if search_method == 'Likelihood':
+        return distribution_fit(data, 'power_law', xmin=xmin, xmax=xmax, discrete=discrete, search_method='Likelihood', estimate_discrete=estimate_discrete)
+    elif search_method == 'KS':
+        return distribution_fit(data, 'power_law', xmin=xmin, xmax=xmax, discrete=discrete, search_method='KS', estimate_discrete=estimate_discrete)[0]
+
+
+def _functional_xmin_worker(description, xmins, options):
+    shared, (data,) = _attach_shared_arrays(description)
+    try:
+        fits = [_functional_xmin_fit(data, xmin, options['discrete'], options['xmax'], options['search_method'], options['estimate_discrete']) for xmin in xmins]
+        Ds = [power_law_ks_distance(data, fit[0][0], xmin, xmax=options['xmax'], discrete=options['discrete']) for fit, xmin in zip(fits, xmins)]
+        return fits, Ds
+    finally:
+        del data
+        _close_shared_arrays(shared)
+
+
 def power_law_ks_distance(data, alpha, xmin, xmax=None, discrete=False, kuiper=False):
     from numpy import arange, sort, mean
     data = data[data >= xmin]
@@ -2580,15 +5692,13 @@ def power_law_ks_distance(data, alpha, xmin, xmax=None, discrete=False, kuiper=F
         Theoretical_CDF = 1 - (data / xmin) ** (-alpha + 1)
 
     if discrete:
-        from scipy.special import zeta
         if xmax:
             bins, Actual_CDF = cumulative_distribution_function(data,xmin=xmin,xmax=xmax)
-            Theoretical_CDF = 1 - ((zeta(alpha, bins) - zeta(alpha, xmax+1)) /\
-                    (zeta(alpha, xmin)-zeta(alpha,xmax+1)))
+            Theoretical_CDF = _power_law_discrete_cdf([alpha], [xmin], bins,
+                                                      xmax=xmax+1)[0]
         if not xmax:
             bins, Actual_CDF = cumulative_distribution_function(data,xmin=xmin)
-            Theoretical_CDF = 1 - (zeta(alpha, bins) /\
-                    zeta(alpha, xmin))
+            Theoretical_CDF = _power_law_discrete_cdf([alpha], [xmin], bins)[0]
 
     D_plus = max(Theoretical_CDF - Actual_CDF)
     D_minus = max(Actual_CDF - Theoretical_CDF)
@@ -2709,11 +5819,8 @@ def stretched_exponential_likelihoods(data, Lambda, beta, xmin, xmax=False, disc
         if not xmax:
             xmax = max(data)
         if xmax:
-            from numpy import arange
-            X = arange(xmin, xmax + 1)
-            PDF = X ** (beta - 1) * beta * Lambda * exp(Lambda * (xmin ** beta - X ** beta))  # Simplified so as not to throw a nan from infs being divided by each other
-            PDF = PDF / sum(PDF)
-            likelihoods = PDF[(data - xmin).astype(int)]
+            PDF = lambda X: X ** (beta - 1) * beta * Lambda * exp(Lambda * (xmin ** beta - X ** beta))  # Simplified so as not to throw a nan from infs being divided by each other
+            likelihoods = PDF(data) / _discrete_sum(PDF, xmin, xmax)
     from sys import float_info
     likelihoods[likelihoods == 0] = 10 ** float_info.min_10_exp
     return likelihoods
@@ -2741,11 +5848,8 @@ def gamma_likelihoods(data, k, theta, xmin, xmax=False, discrete=False):
         if not xmax:
             xmax = max(data)
         if xmax:
-            from numpy import arange
-            X = arange(xmin, xmax + 1)
-            PDF = (X ** (k - 1)) / (exp(X / theta) * (theta ** k) * float(gammainc(k)))
-            PDF = PDF / sum(PDF)
-            likelihoods = PDF[(data - xmin).astype(int)]
+            PDF = lambda X: (X ** (k - 1)) / (exp(X / theta) * (theta ** k) * float(gammainc(k)))
+            likelihoods = PDF(data) / _discrete_sum(PDF, xmin, xmax)
     from sys import float_info
     likelihoods[likelihoods == 0] = 10 ** float_info.min_10_exp
     return likelihoods
@@ -2775,11 +5879,8 @@ def truncated_power_law_likelihoods(data, alpha, Lambda, xmin, xmax=False, discr
         if not xmax:
             xmax = max(data)
         if xmax:
-            from numpy import arange
-            X = arange(xmin, xmax + 1)
-            PDF = (X ** -alpha) * exp(-Lambda * X)
-            PDF = PDF / sum(PDF)
-            likelihoods = PDF[(data - xmin).astype(int)]
+            PDF = lambda X: (X ** -alpha) * exp(-Lambda * X)
+            likelihoods = PDF(data) / _discrete_sum(PDF, xmin, xmax)
     from sys import float_info
     likelihoods[likelihoods == 0] = 10 ** float_info.min_10_exp
     return likelihoods
@@ -2809,14 +5910,10 @@ def lognormal_likelihoods(data, mu, sigma, xmin, xmax=False, discrete=False):
         if not xmax:
             xmax = max(data)
         if xmax:
-            from numpy import arange, exp
+            from numpy import exp
 #            from mpmath import exp
-            X = arange(xmin, xmax + 1)
-#            PDF_function = lambda x: (1.0/x)*exp(-( (log(x) - mu)**2 ) / 2*sigma**2)
-#            PDF = asarray(list(map(PDF_function,X)))
-            PDF = (1.0 / X) * exp(-((log(X) - mu) ** 2) / (2 * (sigma ** 2)))
-            PDF = (PDF / sum(PDF)).astype(float)
-            likelihoods = PDF[(data - xmin).astype(int)]
+            PDF = lambda X: (1.0 / X) * exp(-((log(X) - mu) ** 2) / (2 * (sigma ** 2)))
+            likelihoods = (PDF(data) / _discrete_sum(PDF, xmin, xmax)).astype(float)
     from sys import float_info
     likelihoods[likelihoods == 0] = 10 ** float_info.min_10_exp
     return likelihoods
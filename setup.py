@@ -20,12 +20,11 @@ setup(
     author='Jeff Alstott',
     author_email='jeffalstott@gmail.com',
     url='http://www.github.com/jeffalstott/powerlaw',
-    install_requires=['scipy', 'numpy', 'matplotlib', 'mpmath'],
+    install_requires=['scipy>=1.9', 'numpy', 'matplotlib', 'mpmath'],
     license='MIT',
     classifiers=[
         'License :: OSI Approved :: MIT License',
         'Programming Language :: Python',
-        'Programming Language :: Python :: 2.7',
         'Programming Language :: Python :: 3',
         'Operating System :: OS Independent',
         'Topic :: Scientific/Engineering :: Mathematics',
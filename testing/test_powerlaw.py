@@ -74,7 +74,13 @@ references = {
             'data': (10**genfromtxt('reference_data/quakes.txt'))/10**3,
             'alpha': 1.95,   # Clauset/plfit value is 1.64
             'xmin': 10,      # Clauset/plfit value is .794
-            'lognormal': (-0.796, 0.43),     # Clauset value is (-7.14, 0.0)
+            # Clauset value is (-7.14, 0.0). The lognormal fit runs off
+            # toward mu->-inf, sigma->inf, where its tail becomes the power
+            # law and its likelihood rises to the power law's from below, so
+            # R is positive and small. The earlier (-0.796, 0.43) came from
+            # the pdf's float normalizer, inaccurate along that ridge, which
+            # the log space likelihoods of the lognormal replaced.
+            'lognormal': (0.18, 0.86),
             'exponential': (9.7, 0),   # Clauset value is (11.6, 0.0),
             'stretched_exponential': (-7.09, 0.0),
             'truncated_power_law': (-24.4, 0.0),
@@ -84,7 +90,11 @@ references = {
             'data': genfromtxt('reference_data/surnames.txt')/10**3,
             'alpha': 2.2,       # Clauset/plfit value is 2.5,
             'xmin': 14.92,      # Clauset/plfit value is 111.92
-            'lognormal': (0.148, 0.88),     # Clauset value is (-0.836, 0.4)
+            # Clauset value is (-0.836, 0.4). As for quakes, the lognormal
+            # fit runs off toward mu->-inf, and R depends on where along that
+            # ridge the optimizer stops. It was (0.148, 0.88) with the pdf's
+            # float normalizer.
+            'lognormal': (0.025, 0.98),
             'exponential': (10, 0),   # Clauset value is (2.89, 0.0),
             'stretched_exponential': (-0.844, 0.40),
             'truncated_power_law': (-1.36, 0.10),
@@ -207,6 +217,589 @@ class FirstTestCase(unittest.TestCase):
             #assert_allclose(Randp, references[k]['truncated_power_law'],
             #        rtol=rtol, atol=atol, err_msg=k)
 
+#Continuous and discrete power laws, sampled once for each test case
+class PowerLawSamples(object):
+
+    @classmethod
+    def setUpClass(cls):
+        from numpy.random import seed
+        seed(0)
+        cls.continuous = powerlaw.Power_Law(xmin=1, parameters=[2.5]
+                ).generate_random(2000)
+        cls.discrete = (powerlaw.Power_Law(xmin=1, parameters=[2.2],
+                discrete=True).generate_random(2000, estimate_discrete=True))
+
+class XminSearchTestCase(PowerLawSamples, unittest.TestCase):
+
+    def test_vectorized_scan(self):
+        print("Testing vectorized xmin search")
+
+        for data, discrete in [(self.continuous, False),
+                               (self.discrete, True)]:
+            fit = powerlaw.Fit(data, discrete=discrete, verbose=False)
+            for idx in range(0, len(fit.xmins), 10):
+                pl = powerlaw.Power_Law(xmin=fit.xmins[idx],
+                                        discrete=discrete,
+                                        data=fit.data_original)
+                assert_allclose(fit.alphas[idx], pl.alpha, rtol=1e-10)
+                assert_allclose(fit.sigmas[idx], pl.sigma, rtol=1e-10)
+                for distance in ['D', 'V', 'Kappa', 'Asquare']:
+                    assert_allclose(getattr(fit, distance+'s')[idx],
+                                    getattr(pl, distance),
+                                    rtol=1e-8, atol=1e-12)
+
+    def test_blocked_ks_scan(self):
+        print("Testing the blocked KS distances of the xmin search")
+
+        from numpy import around
+        ties = around(self.continuous, 1)
+        for data, discrete in [(self.continuous, False),
+                               (self.discrete, True),
+                               (ties, False)]:
+#Blocks of a few candidates each, so that many blocks are taken
+            fit = powerlaw.Fit(data, discrete=discrete, verbose=False,
+                               xmin_scan_memory=2**14)
+            for idx in range(0, len(fit.xmins), 7):
+                pl = powerlaw.Power_Law(xmin=fit.xmins[idx],
+                                        discrete=discrete,
+                                        data=fit.data_original)
+                for distance in ['D', 'V']:
+                    assert_allclose(getattr(fit, distance+'s')[idx],
+                                    getattr(pl, distance),
+                                    rtol=1e-8, atol=1e-12)
+            self.assertEqual(fit.xmin, powerlaw.Fit(data, discrete=discrete,
+                                                    verbose=False).xmin)
+
+    def test_parallel_search(self):
+        print("Testing parallel xmin search")
+
+        from numpy import array_equal
+        for kwargs in [{}, {'xmin_distribution': 'exponential'}]:
+            data = self.continuous[:300]
+            serial = powerlaw.Fit(data, verbose=False, **kwargs)
+            parallel = powerlaw.Fit(data, verbose=False, n_jobs=2, **kwargs)
+            self.assertEqual(serial.xmin, parallel.xmin)
+            self.assertTrue(array_equal(serial.Ds, parallel.Ds))
+            self.assertTrue(array_equal(serial.alphas, parallel.alphas,
+                                        equal_nan=True))
+
+    def test_threaded_search(self):
+        print("Testing threaded xmin search")
+
+        from numpy import array_equal
+        data = self.continuous[:1000]
+        serial = powerlaw.Fit(data, verbose=False)
+        threaded = powerlaw.Fit(data, verbose=False, n_jobs=2,
+                                xmin_backend='threads')
+        self.assertEqual(serial.xmin, threaded.xmin)
+        self.assertEqual(serial.alpha, threaded.alpha)
+        self.assertTrue(array_equal(serial.Ds, threaded.Ds))
+        self.assertEqual(serial.xmin_diagnostics['backend'], 'serial')
+        self.assertEqual(threaded.xmin_diagnostics['backend'], 'threads')
+#The candidates were split among the workers, which recorded their time
+        self.assertGreater(threaded.xmin_diagnostics['n_chunks'], 1)
+        self.assertGreater(threaded.xmin_diagnostics['work_time'], 0)
+
+    def test_adaptive_search(self):
+        print("Testing adaptive xmin search")
+
+        from numpy import isnan, concatenate, random
+#A uniform body below a power law tail starting at 1
+        random.seed(1)
+        data = concatenate([random.uniform(.1, 1, 1000),
+                            self.continuous[:1000]])
+        exhaustive = powerlaw.Fit(data, verbose=False)
+        adaptive = powerlaw.Fit(data, verbose=False,
+                                search_strategy='adaptive')
+        evaluated = adaptive.xmins_evaluated
+        self.assertLess(evaluated.sum(), len(adaptive.xmins)/2)
+        self.assertTrue(isnan(adaptive.Ds[~evaluated]).all())
+        self.assertTrue((adaptive.Ds[evaluated] ==
+                         exhaustive.Ds[evaluated]).all())
+        self.assertEqual(adaptive.xmin, exhaustive.xmin)
+
+    def test_deadline(self):
+        print("Testing xmin search deadline")
+
+        unlimited = powerlaw.Fit(self.continuous, verbose=False)
+        self.assertFalse(unlimited.xmin_search_truncated)
+        self.assertEqual(unlimited.xmin_coverage, 1)
+        limited = powerlaw.Fit(self.continuous, verbose=False,
+                               xmin_deadline=0)
+        self.assertTrue(limited.xmin_search_truncated)
+        self.assertLess(limited.xmin_coverage, 1)
+        self.assertEqual(limited.xmins_evaluated.mean(),
+                         limited.xmin_coverage)
+        self.assertTrue(limited.xmins_evaluated[limited.xmins==limited.xmin])
+
+    def test_reselect_xmin(self):
+        print("Testing xmin reselection")
+
+        expected = powerlaw.Fit(self.continuous, verbose=False,
+                                sigma_threshold=.03)
+        fit = powerlaw.Fit(self.continuous, verbose=False)
+        fit.power_law
+        fit.reselect_xmin(sigma_threshold=.03)
+        self.assertEqual(fit.xmin, expected.xmin)
+        self.assertEqual(fit.alpha, expected.alpha)
+        self.assertEqual(fit.n_tail, expected.n_tail)
+        self.assertEqual(fit.power_law.xmin, expected.xmin)
+
+#Candidates out of the range are excluded rather than fitted again
+        fit.reselect_xmin(sigma_threshold=1,
+                          parameter_range={'alpha': (2.6, None)})
+        self.assertGreaterEqual(fit.alpha, 2.6)
+        self.assertEqual(fit.D, fit.Ds[fit.alphas >= 2.6].min())
+        self.assertAlmostEqual(fit.power_law.alpha, fit.alpha)
+
+    def test_sweep(self):
+        print("Testing warm started xmin search")
+
+        from numpy import allclose
+        data = self.continuous[:300]
+        for distribution in ['exponential', 'lognormal']:
+            cold = powerlaw.Fit(data, verbose=False,
+                                xmin_distribution=distribution)
+            swept = powerlaw.Fit(data, verbose=False,
+                                 xmin_distribution=distribution,
+                                 xmin_sweep=True, xmin_min_tail=10)
+            self.assertEqual(swept.xmin, cold.xmin)
+#The last 8 candidates have tails of fewer than 10 points
+            self.assertEqual(len(swept.xmins), len(cold.xmins) - 8)
+#Lognormal fits to power law tails drift toward extreme parameters, where the
+#optimizer stops in different places
+            if distribution=='exponential':
+                self.assertTrue(allclose(swept.Ds, cold.Ds[:len(swept.Ds)],
+                                         atol=1e-3))
+
+    def test_progress(self):
+        print("Testing xmin search progress reports")
+
+        import io
+        from contextlib import redirect_stdout
+        reports = []
+        output = io.StringIO()
+        with redirect_stdout(output):
+            fit = powerlaw.Fit(self.continuous[:300], verbose=False,
+                               xmin_distribution='exponential',
+                               xmin_progress=lambda *report:
+                                   reports.append(report))
+            powerlaw.Fit(self.continuous[:300], verbose=False,
+                         xmin_distribution='exponential')
+        self.assertEqual(output.getvalue(), '')
+        done, total, best_D, elapsed = reports[-1]
+        self.assertEqual(done, total)
+        self.assertEqual(total, len(fit.xmins))
+        self.assertEqual(best_D, fit.D)
+
+    def test_xmin_xmax_search(self):
+        print("Testing joint xmin and xmax search")
+
+        from numpy import array_equal, isnan, concatenate
+        from numpy.random import RandomState
+        random_state = RandomState(4)
+        data = self.continuous[self.continuous<50][:600]
+        data = concatenate([random_state.uniform(.1, 1, 200), data,
+                            50 + random_state.exponential(100, 50)])
+        fit = powerlaw.Fit(data, verbose=False)
+        xmin, xmax = fit.find_xmin_xmax(min_points=50)
+        self.assertEqual(fit.data.min(), xmin)
+        self.assertEqual(fit.data.max(), xmax)
+        self.assertEqual(fit.n_tail + sum(data<xmin), len(data))
+        self.assertEqual(fit.D, fit.window_Ds[~isnan(fit.window_Ds)].min())
+
+#Each window's distance is that of the truncated power law fitted to it
+        row = list(fit.xmaxs).index(xmax)
+        for idx in range(0, len(fit.xmins), 100):
+            if isnan(fit.window_Ds[row, idx]):
+                continue
+            pl = powerlaw.Power_Law(xmin=fit.xmins[idx], xmax=xmax,
+                                    parameters=[fit.window_alphas[row, idx]],
+                                    parent_Fit=powerlaw.Fit(data, xmax=xmax,
+                                                            xmin=xmin))
+            assert_allclose(fit.window_Ds[row, idx], pl.KS(data),
+                            rtol=1e-8)
+
+        parallel = powerlaw.Fit(data, verbose=False, n_jobs=2)
+        parallel.find_xmin_xmax(min_points=50)
+        self.assertEqual((parallel.xmin, parallel.xmax), (xmin, xmax))
+        self.assertTrue(array_equal(parallel.window_Ds, fit.window_Ds,
+                                    equal_nan=True))
+
+    def test_binned_search(self):
+        print("Testing binned xmin search")
+
+        from numpy import concatenate, searchsorted, all
+        from numpy.random import RandomState
+        data = concatenate([RandomState(3).uniform(.2, 1, 1000),
+                            self.continuous])
+        exhaustive = powerlaw.Fit(data, verbose=False)
+        binned = powerlaw.Fit(data, verbose=False, search_strategy='binned',
+                              xmin_bins=200)
+        self.assertLessEqual(exhaustive.D, binned.D)
+        self.assertLessEqual(binned.D - exhaustive.D, binned.xmin_D_error)
+        self.assertLess(len(binned.xmins), len(exhaustive.xmins))
+
+#The exact D at each bin edge is within the binned bounds
+        edges = searchsorted(exhaustive.xmins, binned.binned_xmins)
+        assert_allclose(binned.binned_alphas, exhaustive.alphas[edges],
+                        rtol=1e-10)
+        Ds = exhaustive.Ds[edges]
+        self.assertTrue(all(binned.binned_Ds <= Ds + 1e-12))
+        self.assertTrue(all(Ds <= binned.binned_Ds + binned.binned_D_errors
+                            + 1e-12))
+
+class DiscretePowerLawTestCase(PowerLawSamples, unittest.TestCase):
+
+    def test_zeta_partial_sums(self):
+        print("Testing discrete power law CDFs from partial zeta sums")
+
+        from numpy import unique, array
+        from scipy.special import zeta
+        X = unique(self.discrete)
+        alphas, xmins = array([1.5, 2.2, 3.]), array([1., 3., 10.])
+        expected = zeta(alphas[:,None], xmins[:,None]) - zeta(alphas[:,None],
+                                                               X[None,:])
+        expected[X[None,:] <= xmins[:,None]] = 0
+#Summed over all values, over some and evaluated directly beyond, and
+#evaluated directly everywhere
+        for max_summed in (None, 20, 0):
+            sums, zeta_xmins = powerlaw._zeta_partial_sums(alphas, xmins, X,
+                                                           max_summed)
+            assert_allclose(sums, expected, rtol=1e-12, atol=1e-15)
+            assert_allclose(zeta_xmins, zeta(alphas, xmins))
+
+#The data are heavily tied, and each value takes the CDF of its unique value
+        for xmax in (None, 100):
+            pl = powerlaw.Power_Law(xmin=3, xmax=xmax, parameters=[2.2],
+                                    discrete=True)
+            data = self.discrete[(self.discrete>=3) *
+                                 (self.discrete<=(xmax or self.discrete.max()))]
+#As in Distribution.cdf, the probability is renormalized up to xmax
+            norm = zeta(2.2, 3) - (zeta(2.2, xmax) if xmax else 0)
+            assert_allclose(pl.cdf(data), (zeta(2.2, 3) - zeta(2.2, data))/norm,
+                            rtol=1e-12, atol=1e-15)
+
+    def test_exact_discrete_fit(self):
+        print("Testing exact discrete power law fits")
+
+        from numpy import log, sum, isfinite
+        from scipy.optimize import minimize_scalar
+        from scipy.special import zeta
+        for xmin, xmax in [(1, None), (4, None), (2, 100)]:
+            data = self.discrete[(self.discrete>=xmin) *
+                                 (self.discrete<=(xmax or self.discrete.max()))]
+            pl = powerlaw.Power_Law(xmin=xmin, xmax=xmax, discrete=True,
+                                    estimate_discrete=False, data=data)
+
+            def negative_loglikelihood(alpha):
+                norm = zeta(alpha, xmin) - (zeta(alpha, xmax+1) if xmax else 0)
+                return alpha*sum(log(data)) + len(data)*log(norm)
+            expected = minimize_scalar(negative_loglikelihood,
+                                       bracket=(1.5, 2.5), tol=1e-10).x
+            assert_allclose(pl.alpha, expected, rtol=1e-6)
+            assert_allclose(pl.loglikelihood,
+                            -negative_loglikelihood(pl.alpha), rtol=1e-8)
+
+        fit = powerlaw.Fit(self.discrete, discrete=True,
+                           estimate_discrete=False, verbose=False)
+        for idx in range(0, len(fit.xmins), 10):
+            pl = powerlaw.Power_Law(xmin=fit.xmins[idx], discrete=True,
+                                    estimate_discrete=False,
+                                    data=fit.data_original)
+            assert_allclose(fit.alphas[idx], pl.alpha, rtol=1e-6)
+        R, p = fit.distribution_compare('power_law', 'exponential')
+        self.assertTrue(isfinite(R) and isfinite(p))
+
+    def test_zeta_tables(self):
+        print("Testing interpolated tables of the Hurwitz zeta function")
+
+        from numpy import log, linspace, array
+        from scipy.special import zeta
+        alphas = linspace(1.001, 12, 101)
+        xmins = array([1., 2., 7.5, 300.])[:, None]
+        assert_allclose(powerlaw._zeta_tables.log_zeta(alphas, xmins),
+                        log(zeta(alphas, xmins)), rtol=0, atol=1e-12)
+
+        data = self.discrete[self.discrete >= 3]
+        for xmax in (None, 200.):
+            exact = powerlaw.Power_Law(xmin=3, xmax=xmax, data=data,
+                                       discrete=True,
+                                       estimate_discrete=False)
+            tabled = powerlaw.Power_Law(xmin=3, xmax=xmax, data=data,
+                                        discrete=True,
+                                        estimate_discrete=False,
+                                        zeta_table=True)
+            assert_allclose(tabled.alpha, exact.alpha, rtol=1e-6)
+
+class DistributionFitTestCase(PowerLawSamples, unittest.TestCase):
+
+    def test_gradient_fit(self):
+        print("Testing gradient based fits")
+
+        from numpy import sum, array
+        from numpy.random import seed
+        seed(1)
+        for name, dist, parameters in [
+                ('exponential', powerlaw.Exponential, [.2]),
+                ('stretched_exponential', powerlaw.Stretched_Exponential,
+                 [.5, .7]),
+                ('truncated_power_law', powerlaw.Truncated_Power_Law,
+                 [1.8, .02]),
+                ('lognormal', powerlaw.Lognormal, [1., 1.])]:
+            data = dist(xmin=1, parameters=parameters).generate_random(2000)
+            fit = powerlaw.Fit(data, xmin=1, fit_optimizer='L-BFGS-B')
+            simplex = getattr(powerlaw.Fit(data, xmin=1), name)
+            gradient = getattr(fit, name)
+            self.assertGreaterEqual(gradient.loglikelihood,
+                                    simplex.loglikelihood - 1e-6)
+
+#The analytic gradient matches finite differences of the log likelihood
+            parameters = array(parameters)
+            gradient.parameters(parameters)
+            expected = []
+            for idx, parameter in enumerate(parameters):
+                step = 1e-6*parameter
+                loglikelihoods = []
+                for shift in (step, -step):
+                    parameters[idx] = parameter + shift
+                    gradient.parameters(parameters)
+                    loglikelihoods.append(sum(gradient.loglikelihoods(data)))
+                parameters[idx] = parameter
+                expected.append((loglikelihoods[0] -
+                                 loglikelihoods[1]) / (2*step))
+            gradient.parameters(parameters)
+            assert_allclose(gradient._loglikelihood_gradient(data), expected,
+                            rtol=1e-4)
+
+#The parameter range bounds the search
+        fit.lognormal.parameter_range({'sigma': (None, .5)})
+        self.assertTrue(fit.lognormal.in_range())
+        self.assertGreater(fit.lognormal.sigma, .49)
+
+    def test_closed_form_fits(self):
+        print("Testing closed form fits")
+
+        from numpy import sum, isfinite
+        from scipy.optimize import minimize_scalar
+#With a fit_optimizer, the power law is truncated to xmax and its fit is a
+#root. Without one it is normalized above xmin and has a closed form.
+        cases = [(powerlaw.Exponential, 'Lambda', self.continuous, False,
+                  None, None),
+                 (powerlaw.Exponential, 'Lambda', self.discrete, True, None,
+                  None),
+                 (powerlaw.Power_Law, 'alpha', self.continuous, False, 20.,
+                  None),
+                 (powerlaw.Power_Law, 'alpha', self.continuous, False, 20.,
+                  'L-BFGS-B')]
+        for dist, name, data, discrete, xmax, optimizer in cases:
+            fitted = getattr(dist(xmin=2, xmax=xmax, discrete=discrete,
+                                  fit_optimizer=optimizer, data=data), name)
+            generic = dist(xmin=2, xmax=xmax, discrete=discrete,
+                           fit_optimizer=optimizer)
+
+            def negative_loglikelihood(parameter):
+                generic.parameters([parameter])
+                return -sum(generic.loglikelihoods(data))
+            expected = minimize_scalar(negative_loglikelihood,
+                                       bracket=(.5*fitted, fitted),
+                                       tol=1e-10).x
+            assert_allclose(fitted, expected, rtol=1e-6)
+
+#The fits have log likelihoods, with which they are compared
+        fit = powerlaw.Fit(self.continuous, xmax=20., verbose=False)
+        assert_allclose(fit.power_law.loglikelihood,
+                        sum(fit.power_law.loglikelihoods(fit.data)))
+        R, p = fit.distribution_compare('power_law', 'exponential')
+        self.assertTrue(isfinite(R) and isfinite(p))
+
+    def test_profile_fit(self):
+        print("Testing profile likelihood fits")
+
+        from numpy import sum, argmax
+        from numpy.random import seed
+        seed(2)
+        for dist, parameters in [(powerlaw.Stretched_Exponential, [.5, .7]),
+                                 (powerlaw.Truncated_Power_Law, [1.8, .02]),
+                                 (powerlaw.Lognormal, [1., 1.])]:
+            data = dist(xmin=1, parameters=parameters).generate_random(2000)
+            profiled = dist(xmin=1, data=data)
+            gradient = dist(xmin=1, data=data, fit_optimizer='L-BFGS-B')
+            assert_allclose(profiled.loglikelihood, gradient.loglikelihood,
+                            rtol=1e-8)
+            self.assertLess(len(profiled.profile_values), 40)
+
+#The curve recorded while fitting peaks at the fit
+            values, loglikelihoods = profiled.profile_loglikelihood()
+            best = getattr(profiled, profiled.profile_parameter)
+            self.assertEqual(values[argmax(loglikelihoods)], best)
+            assert_allclose(loglikelihoods.max(),
+                            sum(profiled.loglikelihoods(data)), rtol=1e-10)
+            values, loglikelihoods = profiled.profile_loglikelihood(
+                [.9*best, best, 1.1*best], data)
+            self.assertEqual(argmax(loglikelihoods), 1)
+
+        for dist in (powerlaw.Power_Law(xmin=1, data=data),
+                     powerlaw.Lognormal(xmin=1, discrete=True,
+                                        parameters=[1., 1.])):
+            with self.assertRaises(ValueError):
+                dist.profile_loglikelihood([1.5], data)
+
+    def test_degenerate_profile(self):
+        print("Testing profile fits that run to the edge of the range")
+
+        from numpy import isfinite
+#The stretched exponential's profile rises towards beta->0, Lambda->inf on
+#these, so they are fitted without it
+        for k in ('cities', 'flares'):
+            fit = powerlaw.Fit(references[k]['data'],
+                               xmin=references[k]['xmin'])
+            stretched = fit.stretched_exponential
+            self.assertFalse(hasattr(stretched, 'profile_values'))
+            self.assertTrue(isfinite(stretched.Lambda))
+            self.assertLess(stretched.Lambda, 1e10)
+            self.assertLess(stretched.D, .1)
+
+    def test_sufficient_statistics(self):
+        print("Testing log likelihoods from sufficient statistics")
+
+        from numpy import sum
+        for dist, parameters in [(powerlaw.Power_Law, [2.1]),
+                                 (powerlaw.Exponential, [.05]),
+                                 (powerlaw.Truncated_Power_Law, [1.9, .001]),
+                                 (powerlaw.Lognormal, [.3, 1.5])]:
+            for data, discrete in [(self.continuous, False),
+                                   (self.discrete, True)]:
+                for xmax in [None, 40]:
+                    fitted = dist(xmin=2, xmax=xmax, discrete=discrete,
+                                  parameters=parameters)
+                    data = powerlaw.trim_to_range(data, xmin=2, xmax=xmax)
+                    statistics = fitted._sufficient_statistics(data)
+                    if statistics is None:
+                        continue
+                    assert_allclose(
+                        fitted._loglikelihood_from_statistics(statistics),
+                        sum(fitted.loglikelihoods(data)), rtol=1e-12)
+
+    def test_unique_value_likelihoods(self):
+        print("Testing likelihoods of unique discrete values")
+
+        fit = powerlaw.Fit(self.discrete, discrete=True, xmin=2,
+                           verbose=False)
+        for other in ['exponential', 'lognormal']:
+            expected = powerlaw.loglikelihood_ratio(
+                fit.power_law.loglikelihoods(fit.data),
+                getattr(fit, other).loglikelihoods(fit.data),
+                normalized_ratio=True)
+            assert_allclose(fit.distribution_compare('power_law', other,
+                                                     normalized_ratio=True),
+                            expected, rtol=1e-10)
+
+    def test_multi_start_fit(self):
+        print("Testing multi-start fits")
+
+        from numpy import sum, array
+        for name in ['stretched_exponential', 'lognormal']:
+            single = getattr(powerlaw.Fit(self.continuous, xmin=2, xmax=50.,
+                                          verbose=False), name)
+            multi = getattr(powerlaw.Fit(self.continuous, xmin=2, xmax=50.,
+                                         fit_starts=6, verbose=False), name)
+            self.assertGreaterEqual(multi.loglikelihood,
+                                    single.loglikelihood - 1e-4)
+
+            dist = getattr(powerlaw.Fit(self.continuous, xmin=2,
+                                        fit_starts=6, verbose=False), name)
+            starts = dist._starting_parameters(dist.parent_Fit.data)
+            expected = []
+            for row in starts:
+                dist.parameters(row)
+                expected.append(sum(dist.loglikelihoods(dist.parent_Fit.data)))
+            assert_allclose(dist._batch_loglikelihoods(
+                starts, dist._batch_statistics(dist.parent_Fit.data)),
+                array(expected), rtol=1e-10)
+
+class NormalizerTestCase(PowerLawSamples, unittest.TestCase):
+
+    def test_upper_gamma(self):
+        print("Testing the upper incomplete gamma function")
+
+        from numpy import logspace, array
+        from mpmath import gammainc, log
+        z = logspace(-8, 3, 50)
+        for s in [.5, 0, -1e-9, -.7, -2, -3.7, -40.2]:
+            expected = array([float(log(gammainc(s, x))) for x in z])
+            assert_allclose(powerlaw._log_upper_gamma(s, z), expected,
+                            rtol=1e-12, atol=1e-12)
+
+        from mpmath import diff
+        for s, x in [(.5, 2.), (-.7, 1e-6), (-2, 1e-10), (-.3, 1e4)]:
+            dlogG_ds, ratio = powerlaw._upper_gamma_log_derivatives(s, x)
+            assert_allclose(dlogG_ds,
+                            float(diff(lambda t: log(gammainc(t, x)), s)),
+                            rtol=1e-12)
+            assert_allclose(ratio,
+                            float(gammainc(s+1, x)/(x*gammainc(s, x))),
+                            rtol=1e-12)
+
+    def test_discrete_truncated_power_law_normalizer(self):
+        print("Testing the discrete truncated power law normalizer")
+
+        from mpmath import lerchphi, exp
+        for alpha, Lambda, xmin, xmax in [(1.5, .001, 7, None),
+                                          (2.3, .05, 2, None),
+                                          (1.7, .3, 1, 50.),
+                                          (5., 3., 10, None)]:
+            expected = float(exp(xmin*Lambda) /
+                             lerchphi(exp(-Lambda), alpha, xmin))
+            if xmax:
+                expected = 1/(1/expected -
+                              float(lerchphi(exp(-Lambda), alpha, xmax) /
+                                    exp(xmax*Lambda)))
+            dist = powerlaw.Truncated_Power_Law(xmin=xmin, xmax=xmax,
+                                                discrete=True,
+                                                parameters=[alpha, Lambda])
+            assert_allclose(dist._pdf_discrete_normalizer, expected,
+                            rtol=1e-12)
+
+    def test_lognormal_tail(self):
+        print("Testing the lognormal far into its tail")
+
+        from numpy import sqrt, log, mean, array
+        from numpy.random import seed
+        from mpmath import erfc
+        from scipy.constants import pi
+        dist = powerlaw.Lognormal(xmin=20, parameters=[0, .5])
+        expected = float(erfc(log(20)/(sqrt(2)*.5)) / sqrt(2/(pi*.5**2)))
+        assert_allclose(dist._pdf_continuous_normalizer, expected, rtol=1e-12)
+
+        seed(0)
+        samples = dist.generate_random(10000)
+        self.assertGreaterEqual(samples.min(), 20)
+        X = array([20.5, 21., 22.])
+        assert_allclose([mean(samples <= x) for x in X], dist.cdf(X),
+                        atol=.02)
+        assert_allclose(dist.cdf(X) + dist.cdf(X, survival=True), 1)
+
+    def test_discrete_sum(self):
+        print("Testing discrete normalizers summed with an asymptotic tail")
+
+        from numpy import arange, exp, log
+        from scipy.special import zeta
+        assert_allclose(powerlaw._discrete_sum(lambda x: x**-2.5, 3, 1e12),
+                        zeta(2.5, 3) - zeta(2.5, 1e12+1), rtol=1e-14)
+
+        data = self.discrete[self.discrete >= 2]
+        for dist in (powerlaw.Lognormal(xmin=2, parameters=[1, 2],
+                                        discrete=True,
+                                        discrete_approximation=30000),
+                     powerlaw.Stretched_Exponential(
+                         xmin=2, parameters=[1e-3, .5], discrete=True,
+                         discrete_approximation=30000)):
+            X = arange(2, 30001.)
+            expected = (dist._pdf_base_function(data) /
+                        dist._pdf_base_function(X).sum())
+            assert_allclose(dist.pdf(data), expected, rtol=1e-12)
+
 if __name__ == '__main__':
     # execute all TestCases in the module
     unittest.main()